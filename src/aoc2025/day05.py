@@ -1,28 +1,222 @@
+import heapq
+import mmap
+import os
+import random
+import struct
+import tempfile
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched, groupby
 from pathlib import Path
 from pprint import pprint
 
 from aoc2025.utils.io import read_input_lines
+from aoc2025.utils.benchmark import peak_memory_callable, time_callable
 
+try:
+    import numpy as np
+except ImportError:  # NumPy arrays are optional inputs, lists always work.
+    np = None
 
-from collections.abc import Iterator
+
+from collections.abc import Iterable, Iterator
 
 
 class MultiRange:
-    """A class representing a set of ranges."""
+    """A class representing a set of ranges.
 
-    def __init__(self, ranges: list[list[int]]) -> None:
+    `len` and iteration follow the raw ranges, so overlapping input is counted
+    once per range. Membership and `count_in` use the merged intervals, so for
+    overlapping input `len(mr)` can exceed `mr.count_in(lo, hi)` over the full
+    span.
+    """
+
+    def __init__(self, ranges: list[list[int]], merged: bool = False) -> None:
         self.ranges: list[list[int]] = ranges
         self.range_objects: list[range] = [range(*args) for args in ranges]
 
+        # Membership is answered from the merged intervals, kept as two parallel
+        # sorted lists so a lookup is a single bisect. Input that is already
+        # merged (sorted, disjoint, non-empty) skips the re-sort.
+        bounds = ranges
+        if not merged:
+            bounds = MultiRange.optimize_ranges([r for r in ranges if r[0] < r[1]])
+        self.starts: list[int] = [start for start, _ in bounds]
+        self.ends: list[int] = [end for _, end in bounds]
+        # None until first built, False once the bounds are known not to fit.
+        self._bound_arrays: "tuple[np.ndarray, ...] | bool | None" = None
+
+        # prefix[i] is the number of integers covered by the merged intervals
+        # before interval i, so window counts need two bisects.
+        self.prefix: list[int] = [0]
+        for start, end in zip(self.starts, self.ends, strict=True):
+            self.prefix.append(self.prefix[-1] + end - start)
+
+        self._total: int = sum(len(r) for r in self.range_objects)
+
     def __contains__(self, value: int) -> bool:
-        return any(value in r for r in self.range_objects)
+        idx = bisect_right(self.starts, value) - 1
+        return idx >= 0 and value < self.ends[idx]
+
+    @classmethod
+    def load(cls, path: str | Path) -> "MultiRange":
+        """Load merged intervals written by `write_interval_file` without
+        re-sorting them."""
+        return cls(
+            [[start, end] for start, end in iter_interval_file(path)], merged=True
+        )
+
+    @classmethod
+    def open(cls, path: str | Path, verify: bool = False) -> "MappedMultiRange":
+        """Memory-map an index written by `save`; see MappedMultiRange."""
+        return MappedMultiRange(path, verify=verify)
+
+    def save(self, path: str | Path, block_size: int = 16) -> int:
+        """Write the merged intervals as a binary index for `open`.
+
+        Returns:
+            int: The number of intervals written.
+        """
+        return write_range_index(
+            path, zip(self.starts, self.ends, strict=True), block_size
+        )
+
+    def interval_index(self) -> "IntervalIndex":
+        """Build an IntervalIndex over the raw, unmerged ranges."""
+        return IntervalIndex(self.ranges)
+
+    def compact(self) -> "CompactMultiRange":
+        """Return a CompactMultiRange over the merged intervals."""
+        return CompactMultiRange(zip(self.starts, self.ends, strict=True), merged=True)
+
+    def _bounds_as_arrays(self) -> "tuple[np.ndarray, ...] | None":
+        """The merged starts, ends and prefix lengths as int64 arrays, or None
+        if they do not fit."""
+        if self._bound_arrays is None:
+            try:
+                self._bound_arrays = (
+                    np.array(self.starts, dtype=np.int64),
+                    np.array(self.ends, dtype=np.int64),
+                    np.array(self.prefix, dtype=np.int64),
+                )
+            except OverflowError:
+                self._bound_arrays = False
+        return self._bound_arrays or None
+
+    def _covered_below(self, x: int) -> int:
+        # Number of covered integers strictly below x.
+        j = bisect_right(self.starts, x)
+        if j == 0:
+            return 0
+        return self.prefix[j - 1] + min(self.ends[j - 1], x) - self.starts[j - 1]
+
+    def count_in(self, lo: int, hi: int) -> int:
+        """Count the covered integers in the half-open window [lo, hi)."""
+        if lo >= hi:
+            return 0
+        return self._covered_below(hi) - self._covered_below(lo)
+
+    def count_in_batch(
+        self, los: "Iterable[int] | np.ndarray", his: "Iterable[int] | np.ndarray"
+    ) -> "list[int] | np.ndarray":
+        """Vectorized `count_in` over parallel sequences of window bounds.
+
+        Integer NumPy arrays are answered with `searchsorted` against the prefix
+        array and give an int64 array back.
+        """
+        if (
+            np is not None
+            and isinstance(los, np.ndarray)
+            and isinstance(his, np.ndarray)
+            and los.dtype.kind in "iu"
+            and his.dtype.kind in "iu"
+        ):
+            bounds = self._bounds_as_arrays()
+            if bounds is not None:
+                return np.maximum(
+                    self._covered_below_array(his, bounds)
+                    - self._covered_below_array(los, bounds),
+                    0,
+                )
+            los, his = los.tolist(), his.tolist()
+        return [self.count_in(lo, hi) for lo, hi in zip(los, his, strict=True)]
+
+    @staticmethod
+    def _covered_below_array(
+        x: "np.ndarray", bounds: "tuple[np.ndarray, ...]"
+    ) -> "np.ndarray":
+        starts, ends, prefix = bounds
+        if len(starts) == 0:
+            return np.zeros(x.shape, dtype=np.int64)
+        j = np.searchsorted(starts, x, side="right")
+        k = np.maximum(j - 1, 0)
+        covered = prefix[k] + np.minimum(ends[k], x) - starts[k]
+        return np.where(j > 0, covered, 0)
+
+    def mask_contained(
+        self, ids: "Iterable[int] | np.ndarray", presorted: bool = False
+    ) -> "list[bool] | np.ndarray":
+        """Return, for each ID in order, whether it lies in any range.
+
+        Queries are sorted (unless `presorted`) and swept against the merged
+        intervals in a single merge-join pass. Integer NumPy arrays are answered
+        with `searchsorted` and give a boolean array back.
+        """
+        if np is not None and isinstance(ids, np.ndarray):
+            bounds = self._bounds_as_arrays()
+            if bounds is not None and ids.dtype.kind in "iu":
+                starts, ends, _ = bounds
+                if len(starts) == 0:
+                    return np.zeros(ids.shape, dtype=bool)
+                idx = np.searchsorted(starts, ids, side="right") - 1
+                return (idx >= 0) & (ids < ends[np.maximum(idx, 0)])
+            ids = ids.tolist()
+
+        ids = list(ids)
+        order: Iterable[int] = (
+            range(len(ids))
+            if presorted
+            else sorted(range(len(ids)), key=ids.__getitem__)
+        )
+
+        starts, ends = self.starts, self.ends
+        n = len(starts)
+        mask = [False] * len(ids)
+        i = 0
+        for idx in order:
+            value = ids[idx]
+            while i < n and ends[i] <= value:
+                i += 1
+            mask[idx] = i < n and starts[i] <= value
+        return mask
+
+    def count_contained(
+        self, ids: "Iterable[int] | np.ndarray", presorted: bool = False
+    ) -> int:
+        """Count the IDs lying in any range, with the same sweep as
+        `mask_contained`."""
+        if np is not None and isinstance(ids, np.ndarray):
+            return int(np.count_nonzero(self.mask_contained(ids)))
+
+        starts, ends = self.starts, self.ends
+        n = len(starts)
+        count = 0
+        i = 0
+        for value in ids if presorted else sorted(ids):
+            while i < n and ends[i] <= value:
+                i += 1
+            if i < n and starts[i] <= value:
+                count += 1
+        return count
 
     def __iter__(self) -> Iterator[int]:
         for r in self.range_objects:
             yield from r
 
     def __len__(self) -> int:
-        return sum(len(r) for r in self.range_objects)
+        return self._total
 
     def __repr__(self) -> str:
         return f"MultiRange({self.ranges!r})"
@@ -55,6 +249,1020 @@ class MultiRange:
         merged.append([cur_start, cur_end])
         return merged
 
+    @staticmethod
+    def optimize_ranges_parallel(
+        ranges: list[list[int]],
+        workers: int | None = None,
+        min_shard: int = 100_000,
+    ) -> list[list[int]]:
+        """Process-pool version of `optimize_ranges` with identical output.
+
+        Each worker sorts and merges a contiguous shard of the input; the parent
+        k-way merges the (usually much smaller) shard outputs, coalescing on the
+        fly. Inputs too small to give every worker `min_shard` ranges are merged
+        serially.
+        """
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(ranges) // max(min_shard, 1))
+        if workers <= 1:
+            return MultiRange.optimize_ranges(ranges)
+
+        shard_size = -(-len(ranges) // workers)
+        shards = [ranges[i : i + shard_size] for i in range(0, len(ranges), shard_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            merged_shards = list(pool.map(MultiRange.optimize_ranges, shards))
+
+        # heapq.merge is stable across shards, matching the serial stable sort.
+        merged = heapq.merge(*merged_shards, key=lambda r: r[0])
+        return [[start, end] for start, end in coalesce_intervals(merged)]
+
+
+class CompactMultiRange:
+    """A memory-lean, merged MultiRange backed by two flat integer buffers.
+
+    Bounds are stored in `array("q")` buffers, falling back to plain lists of
+    Python ints when a bound does not fit in 64 bits. There are no per-interval
+    objects, and intervals are always merged, so iteration and len cover each
+    integer once.
+    """
+
+    __slots__ = ("starts", "ends", "_total")
+
+    def __init__(self, ranges: Iterable[list[int]], merged: bool = False) -> None:
+        if not merged:
+            ranges = MultiRange.optimize_ranges([r for r in ranges if r[0] < r[1]])
+
+        self.starts: array[int] | list[int] = array("q")
+        self.ends: array[int] | list[int] = array("q")
+        self._total: int = 0
+        for start, end in ranges:
+            try:
+                self.starts.append(start)
+                self.ends.append(end)
+            except OverflowError:
+                self._widen()
+                self.starts.append(start)
+                self.ends.append(end)
+            self._total += end - start
+
+    def _widen(self) -> None:
+        # Switch to arbitrary-precision storage, dropping a half-appended pair.
+        if isinstance(self.starts, array):
+            self.starts = self.starts.tolist()[: len(self.ends)]
+            self.ends = self.ends.tolist()
+
+    def __contains__(self, value: int) -> bool:
+        idx = bisect_right(self.starts, value) - 1
+        return idx >= 0 and value < self.ends[idx]
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self.starts, self.ends, strict=True):
+            yield from range(start, end)
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __repr__(self) -> str:
+        return f"CompactMultiRange({len(self.starts)} intervals)"
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the bound buffers."""
+        if isinstance(self.starts, array):
+            return (len(self.starts) + len(self.ends)) * self.starts.itemsize
+        return sum(8 + v.__sizeof__() for v in (*self.starts, *self.ends))
+
+    def intervals(self) -> list[list[int]]:
+        """The merged intervals as [start, stop) pairs."""
+        return [[start, end] for start, end in zip(self.starts, self.ends, strict=True)]
+
+
+class IntervalSet:
+    """A mutable set of integers stored as canonical half-open intervals.
+
+    Intervals are kept merged (no overlaps, no adjacency) in two parallel sorted
+    lists, so edits only touch the intervals they overlap. The number of covered
+    integers is maintained as a running total.
+    """
+
+    def __init__(self, ranges: Iterable[list[int]] = ()) -> None:
+        merged = MultiRange.optimize_ranges([r for r in ranges if r[0] < r[1]])
+        self.starts: list[int] = [start for start, _ in merged]
+        self.ends: list[int] = [end for _, end in merged]
+        self._total: int = sum(end - start for start, end in merged)
+
+    def __contains__(self, value: int) -> bool:
+        idx = bisect_right(self.starts, value) - 1
+        return idx >= 0 and value < self.ends[idx]
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self.starts, self.ends, strict=True):
+            yield from range(start, end)
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.starts == other.starts and self.ends == other.ends
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.intervals()!r})"
+
+    def __or__(self, other: "IntervalSet") -> "IntervalSet":
+        return self.union(other)
+
+    def __and__(self, other: "IntervalSet") -> "IntervalSet":
+        return self.intersection(other)
+
+    def __sub__(self, other: "IntervalSet") -> "IntervalSet":
+        return self.difference(other)
+
+    def intervals(self) -> list[list[int]]:
+        """The canonical intervals as [start, stop) pairs."""
+        return [[start, end] for start, end in zip(self.starts, self.ends, strict=True)]
+
+    def to_multi_range(self) -> MultiRange:
+        """Build a MultiRange over the same integers."""
+        return MultiRange(self.intervals())
+
+    def copy(self) -> "IntervalSet":
+        out = IntervalSet()
+        out.starts = self.starts.copy()
+        out.ends = self.ends.copy()
+        out._total = self._total
+        return out
+
+    def add(self, lo: int, hi: int) -> None:
+        """Add the integers in [lo, hi)."""
+        if lo >= hi:
+            return
+        # Intervals touching [lo, hi), adjacency included, are i .. j - 1.
+        i = bisect_left(self.ends, lo)
+        j = bisect_right(self.starts, hi)
+        covered = 0
+        if i < j:
+            covered = sum(self.ends[k] - self.starts[k] for k in range(i, j))
+            lo = min(lo, self.starts[i])
+            hi = max(hi, self.ends[j - 1])
+        self.starts[i:j] = [lo]
+        self.ends[i:j] = [hi]
+        self._total += hi - lo - covered
+
+    def remove(self, lo: int, hi: int) -> None:
+        """Remove the integers in [lo, hi), if present."""
+        if lo >= hi:
+            return
+        # Intervals overlapping [lo, hi) are i .. j - 1.
+        i = bisect_right(self.ends, lo)
+        j = bisect_left(self.starts, hi)
+        if i >= j:
+            return
+
+        covered = sum(self.ends[k] - self.starts[k] for k in range(i, j))
+        new_starts: list[int] = []
+        new_ends: list[int] = []
+        if self.starts[i] < lo:
+            new_starts.append(self.starts[i])
+            new_ends.append(lo)
+        if self.ends[j - 1] > hi:
+            new_starts.append(hi)
+            new_ends.append(self.ends[j - 1])
+
+        kept = sum(end - start for start, end in zip(new_starts, new_ends, strict=True))
+        self.starts[i:j] = new_starts
+        self.ends[i:j] = new_ends
+        self._total -= covered - kept
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        """Integers in either set."""
+        # Two-pointer merge of both interval lists by start, coalescing
+        # overlapping or adjacent intervals on the fly.
+        out = IntervalSet()
+        i = j = 0
+        n, m = len(self.starts), len(other.starts)
+        while i < n or j < m:
+            if j >= m or (i < n and self.starts[i] <= other.starts[j]):
+                start, end = self.starts[i], self.ends[i]
+                i += 1
+            else:
+                start, end = other.starts[j], other.ends[j]
+                j += 1
+            if out.ends and start <= out.ends[-1]:
+                if end > out.ends[-1]:
+                    out._total += end - out.ends[-1]
+                    out.ends[-1] = end
+            else:
+                out.starts.append(start)
+                out.ends.append(end)
+                out._total += end - start
+        return out
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        """Integers in both sets."""
+        large, small = (
+            (self, other) if len(self.starts) >= len(other.starts) else (other, self)
+        )
+        out = IntervalSet()
+        n = len(large.starts)
+        for start, end in zip(small.starts, small.ends, strict=True):
+            k = bisect_right(large.ends, start)
+            while k < n and large.starts[k] < end:
+                lo = max(start, large.starts[k])
+                hi = min(end, large.ends[k])
+                out.starts.append(lo)
+                out.ends.append(hi)
+                out._total += hi - lo
+                k += 1
+        return out
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        """Integers in this set but not in `other`."""
+        # Sweep both interval lists once; j only moves forward, past intervals
+        # of `other` that end before the current piece starts.
+        out = IntervalSet()
+        j, m = 0, len(other.starts)
+        for start, end in zip(self.starts, self.ends, strict=True):
+            while j < m and other.ends[j] <= start:
+                j += 1
+            k = j
+            while k < m and other.starts[k] < end:
+                if other.starts[k] > start:
+                    out.starts.append(start)
+                    out.ends.append(other.starts[k])
+                    out._total += other.starts[k] - start
+                start = max(start, other.ends[k])
+                if start >= end:
+                    break
+                k += 1
+            if start < end:
+                out.starts.append(start)
+                out.ends.append(end)
+                out._total += end - start
+        return out
+
+
+class MappedMultiRange:
+    """A read-only, merged MultiRange answered from a memory-mapped index file.
+
+    Nothing is decoded at open: membership and window counts bisect the
+    mapped block index and decode a single block of varints. Intervals are
+    merged, so len counts each integer once. Use `MultiRange.open` to build
+    one, and close it (or use it as a context manager) to release the map.
+    """
+
+    def __init__(self, path: str | Path, verify: bool = False) -> None:
+        with Path(path).open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._view) < INDEX_HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is too short to be a range index")
+
+        (
+            magic,
+            version,
+            self.block_size,
+            self.count,
+            n_blocks,
+            data_size,
+            self._total,
+            self.checksum,
+        ) = INDEX_HEADER.unpack_from(self._view)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} range index")
+        if len(self._view) != _index_size(n_blocks, data_size):
+            self.close()
+            raise ValueError(f"{path} is truncated or has trailing bytes")
+
+        data_start = INDEX_HEADER.size
+        index_start = data_start + _padded(data_size)
+        step = n_blocks * 8
+        self._data = self._view[data_start : data_start + data_size]
+        self._block_starts = self._view[index_start : index_start + step].cast("q")
+        self._block_prefix = self._view[
+            index_start + step : index_start + 2 * step
+        ].cast("q")
+        self._block_offsets = self._view[
+            index_start + 2 * step : index_start + 3 * step
+        ].cast("q")
+
+        if verify:
+            self.verify()
+
+    def verify(self) -> None:
+        """Check the header fields and payload against the header checksum.
+
+        Raises:
+            ValueError: If the checksum does not match.
+        """
+        payload_crc = zlib.crc32(self._view[INDEX_HEADER.size :])
+        header = self._view[: INDEX_HEADER.size]
+        if _index_checksum(header, payload_crc) != self.checksum:
+            raise ValueError("Range index checksum mismatch")
+
+    def close(self) -> None:
+        # Views must be released before the map can close.
+        for name in ("_block_offsets", "_block_prefix", "_block_starts", "_data"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "MappedMultiRange":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _block(self, b: int) -> Iterator[tuple[int, int]]:
+        # Decode the (start, stop) pairs of block b.
+        data = self._data
+        pos = self._block_offsets[b]
+        end = self._block_starts[b]
+        for _ in range(min(self.block_size, self.count - b * self.block_size)):
+            gap, pos = _read_varint(data, pos)
+            length, pos = _read_varint(data, pos)
+            start = end + gap
+            end = start + length
+            yield start, end
+
+    def intervals(self) -> Iterator[tuple[int, int]]:
+        """Stream the merged intervals as (start, stop) pairs."""
+        for b in range(len(self._block_starts)):
+            yield from self._block(b)
+
+    def __contains__(self, value: int) -> bool:
+        b = bisect_right(self._block_starts, value) - 1
+        if b < 0:
+            return False
+        for start, end in self._block(b):
+            if value < start:
+                return False
+            if value < end:
+                return True
+        return False
+
+    def _covered_below(self, x: int) -> int:
+        b = bisect_right(self._block_starts, x) - 1
+        if b < 0:
+            return 0
+        covered = self._block_prefix[b]
+        for start, end in self._block(b):
+            if start >= x:
+                break
+            covered += min(end, x) - start
+        return covered
+
+    def count_in(self, lo: int, hi: int) -> int:
+        """Count the covered integers in the half-open window [lo, hi)."""
+        if lo >= hi:
+            return 0
+        return self._covered_below(hi) - self._covered_below(lo)
+
+    def count_contained(self, ids: Iterable[int], presorted: bool = False) -> int:
+        """Count the IDs lying in any interval with one sweep over the index."""
+        intervals = self.intervals()
+        start, end = next(intervals, (None, None))
+        count = 0
+        for value in ids if presorted else sorted(ids):
+            while end is not None and end <= value:
+                start, end = next(intervals, (None, None))
+            if end is None:
+                break
+            if start <= value:
+                count += 1
+        return count
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in self.intervals():
+            yield from range(start, end)
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __repr__(self) -> str:
+        return f"MappedMultiRange({self.count} intervals)"
+
+
+class _CenteredNode:
+    """A centered interval tree node holding the intervals that contain
+    `center`, sorted by start and, separately, by descending stop."""
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(
+        self,
+        center: int,
+        by_start: list[tuple[int, int]],
+        by_end: list[tuple[int, int]],
+        left: "_CenteredNode | None",
+        right: "_CenteredNode | None",
+    ) -> None:
+        self.center: int = center
+        # (start, range index) and (stop, range index) pairs.
+        self.by_start: list[tuple[int, int]] = by_start
+        self.by_end: list[tuple[int, int]] = by_end
+        self.left: _CenteredNode | None = left
+        self.right: _CenteredNode | None = right
+
+
+class IntervalIndex:
+    """Stabbing queries over the raw, possibly overlapping ranges.
+
+    Unlike MultiRange, which merges its ranges, this keeps track of which
+    source ranges cover a value. Coverage depth is two bisects over the sorted
+    starts and stops; the covering ranges come from a centered interval tree in
+    O(log n + k). Ranges are reported by their position in the input list.
+    """
+
+    def __init__(self, ranges: list[list[int]]) -> None:
+        self.ranges: list[list[int]] = ranges
+        live = [(start, end, i) for i, (start, end) in enumerate(ranges) if start < end]
+        self.starts: list[int] = sorted(start for start, _, _ in live)
+        self.ends: list[int] = sorted(end for _, end, _ in live)
+        self.root: _CenteredNode | None = self._build(sorted(live))
+
+    @staticmethod
+    def _build(live: list[tuple[int, int, int]]) -> "_CenteredNode | None":
+        # `live` is sorted by start. The median start is covered by its own
+        # interval, so every node is non-empty and each side gets at most half.
+        if not live:
+            return None
+        center = live[len(live) // 2][0]
+        left = [r for r in live if r[1] <= center]
+        right = [r for r in live if r[0] > center]
+        here = [r for r in live if r[0] <= center < r[1]]
+        return _CenteredNode(
+            center,
+            [(start, i) for start, _, i in here],
+            sorted(((end, i) for _, end, i in here), reverse=True),
+            IntervalIndex._build(left),
+            IntervalIndex._build(right),
+        )
+
+    def depth(self, value: int) -> int:
+        """The number of ranges containing `value`."""
+        return bisect_right(self.starts, value) - bisect_right(self.ends, value)
+
+    def stab(self, value: int) -> list[int]:
+        """Indices of the ranges containing `value`, in ascending order."""
+        found: list[int] = []
+        node = self.root
+        while node is not None:
+            if value < node.center:
+                for start, i in node.by_start:
+                    if start > value:
+                        break
+                    found.append(i)
+                node = node.left
+            else:
+                for end, i in node.by_end:
+                    if end <= value:
+                        break
+                    found.append(i)
+                node = node.right
+        found.sort()
+        return found
+
+    def sweep(self, ids: Iterable[int], presorted: bool = False) -> list[list[int]]:
+        """`stab` for many IDs at once, in input order.
+
+        The IDs are sorted (unless `presorted`) and swept against the ranges
+        in start order, with a heap of stops retiring ranges as the sweep
+        passes them.
+        """
+        ids = list(ids)
+        order: Iterable[int] = (
+            range(len(ids))
+            if presorted
+            else sorted(range(len(ids)), key=ids.__getitem__)
+        )
+        pending = sorted(
+            (start, end, i) for i, (start, end) in enumerate(self.ranges) if start < end
+        )
+        active: set[int] = set()
+        stops: list[tuple[int, int]] = []
+        out: list[list[int]] = [[] for _ in ids]
+        k = 0
+        for idx in order:
+            value = ids[idx]
+            while k < len(pending) and pending[k][0] <= value:
+                _, end, i = pending[k]
+                active.add(i)
+                heapq.heappush(stops, (end, i))
+                k += 1
+            while stops and stops[0][0] <= value:
+                active.discard(heapq.heappop(stops)[1])
+            out[idx] = sorted(active)
+        return out
+
+
+# Roaring containers hold the low 16 bits of the values sharing value >> 16.
+# Up to this many values are kept as a sorted array; denser chunks switch to a
+# 65536-bit bitmap, which is smaller past that point.
+ARRAY_CONTAINER_MAX = 4096
+
+
+def _lows_to_bits(lows: "Iterable[int] | np.ndarray") -> int:
+    # A bitmap container as a Python int with bit `low` set for each low.
+    if np is not None and isinstance(lows, np.ndarray):
+        flags = np.zeros(1 << 16, dtype=bool)
+        flags[lows] = True
+        return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+    buf = bytearray(1 << 13)
+    for low in lows:
+        buf[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(buf, "little")
+
+
+class RoaringBitmap:
+    """A compressed set of integers for dense ID sets.
+
+    Values are chunked by their high bits (value >> 16). Each chunk is a sorted
+    `array("H")` of low halves while it holds at most ARRAY_CONTAINER_MAX
+    values, and a 65536-bit bitmap (a Python int) once it is denser, so a
+    dense chunk costs 8 KiB however many IDs it holds.
+    """
+
+    def __init__(
+        self, values: "Iterable[int] | np.ndarray" = (), presorted: bool = False
+    ) -> None:
+        self.keys: list[int] = []
+        self.containers: list[array[int] | int] = []
+        self.cards: list[int] = []
+        self.update(values, presorted)
+
+    def update(
+        self, values: "Iterable[int] | np.ndarray", presorted: bool = False
+    ) -> None:
+        """Add many values, one container at a time.
+
+        A `presorted` iterable is streamed, holding one chunk at a time.
+        Integer NumPy arrays are deduplicated and split into chunks with
+        vectorized operations.
+        """
+        if (
+            np is not None
+            and isinstance(values, np.ndarray)
+            and values.dtype.kind in "iu"
+        ):
+            values = np.unique(values.astype(np.int64, copy=False))
+            highs = values >> 16
+            cuts = np.flatnonzero(np.diff(highs)) + 1
+            for chunk in np.split(values, cuts) if len(values) else ():
+                self._merge(int(chunk[0]) >> 16, (chunk & 0xFFFF).astype(np.uint16))
+            return
+        for key, group in groupby(
+            values if presorted else sorted(values), key=lambda v: v >> 16
+        ):
+            self._merge(key, [v & 0xFFFF for v in group])
+
+    def _merge(self, key: int, lows: "list[int] | np.ndarray") -> None:
+        # Union sorted low halves into the container for `key`.
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+            self.containers.insert(i, array("H"))
+            self.cards.insert(i, 0)
+
+        container = self.containers[i]
+        if isinstance(container, array) and self.cards[i] + len(lows) <= (
+            ARRAY_CONTAINER_MAX
+        ):
+            merged = sorted(set(container).union(map(int, lows)))
+            self.containers[i] = array("H", merged)
+            self.cards[i] = len(merged)
+            return
+
+        bits = container if isinstance(container, int) else _lows_to_bits(container)
+        bits |= _lows_to_bits(lows)
+        card = bits.bit_count()
+        if card <= ARRAY_CONTAINER_MAX:
+            self.containers[i] = array("H", _iter_bits(bits))
+        else:
+            self.containers[i] = bits
+        self.cards[i] = card
+
+    def add(self, value: int) -> None:
+        self._merge(value >> 16, [value & 0xFFFF])
+
+    def __contains__(self, value: int) -> bool:
+        key = value >> 16
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return False
+        container = self.containers[i]
+        low = value & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        j = bisect_left(container, low)
+        return j < len(container) and container[j] == low
+
+    def __iter__(self) -> Iterator[int]:
+        for key, container in zip(self.keys, self.containers, strict=True):
+            base = key << 16
+            lows = _iter_bits(container) if isinstance(container, int) else container
+            for low in lows:
+                yield base + low
+
+    def __len__(self) -> int:
+        return sum(self.cards)
+
+    def __repr__(self) -> str:
+        return f"RoaringBitmap({len(self)} values in {len(self.keys)} containers)"
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the container payloads."""
+        return sum(
+            (1 << 13) if isinstance(c, int) else c.itemsize * len(c)
+            for c in self.containers
+        )
+
+    def _count_low_range(self, i: int, lo: int, hi: int) -> int:
+        # Values of container i whose low half lies in [lo, hi).
+        if lo == 0 and hi == 1 << 16:
+            return self.cards[i]
+        container = self.containers[i]
+        if isinstance(container, int):
+            return (container >> lo & ((1 << (hi - lo)) - 1)).bit_count()
+        return bisect_left(container, hi) - bisect_left(container, lo)
+
+    def intersection_count(
+        self, multi_range: "MultiRange | CompactMultiRange | IntervalSet"
+    ) -> int:
+        """Count the values lying in the merged intervals of `multi_range`.
+
+        Each interval visits only the containers it overlaps; fully covered
+        containers contribute their cardinality without being read.
+        """
+        keys = self.keys
+        n = len(keys)
+        count = 0
+        for start, end in zip(multi_range.starts, multi_range.ends, strict=True):
+            i = bisect_left(keys, start >> 16)
+            last = (end - 1) >> 16
+            while i < n and keys[i] <= last:
+                base = keys[i] << 16
+                count += self._count_low_range(
+                    i, max(start - base, 0), min(end - base, 1 << 16)
+                )
+                i += 1
+        return count
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    # Positions of the set bits, ascending.
+    data = bits.to_bytes(1 << 13, "little")
+    for byte_idx, byte in enumerate(data):
+        while byte:
+            low_bit = byte & -byte
+            yield (byte_idx << 3) + low_bit.bit_length() - 1
+            byte ^= low_bit
+
+
+# On-disk interval record: two little-endian signed 64-bit bounds.
+INTERVAL_RECORD = struct.Struct("<qq")
+
+# Range index file: header, then per-block LEB128 varint (gap, length) pairs
+# padded to 8 bytes, then three int64 arrays over the blocks: first start,
+# covered integers before the block, and byte offset into the varint data.
+# The block arrays are in native byte order so the reader can cast them in
+# place. The CRC32 covers everything after the header, then the header itself
+# with its checksum slot zeroed.
+INDEX_MAGIC = b"AOCRIDX\0"
+INDEX_VERSION = 2
+INDEX_HEADER = struct.Struct("<8sIIQQQqI4x")
+_INDEX_CHECKSUM_SLOT = slice(
+    struct.calcsize("<8sIIQQQq"), struct.calcsize("<8sIIQQQqI")
+)
+
+
+def parse_range_line(line: str) -> list[int]:
+    """Parse an inclusive "lower-upper" line into a half-open [lower, upper + 1)."""
+    # Search past the first character so a negative lower bound still parses.
+    sep = line.index("-", 1)
+    return [int(line[:sep]), int(line[sep + 1 :]) + 1]
+
+
+def coalesce_intervals(
+    intervals: Iterable[tuple[int, int]],
+) -> Iterator[tuple[int, int]]:
+    """Merge overlapping or adjacent intervals from a stream sorted by start,
+    with the same rules as `MultiRange.optimize_ranges`."""
+    it = iter(intervals)
+    first = next(it, None)
+    if first is None:
+        return
+    cur_start, cur_end = first
+    for start, end in it:
+        if start <= cur_end:
+            cur_end = max(cur_end, end)
+        else:
+            yield cur_start, cur_end
+            cur_start, cur_end = start, end
+    yield cur_start, cur_end
+
+
+def write_interval_file(
+    path: str | Path, intervals: Iterable[tuple[int, int] | list[int]]
+) -> int:
+    """Stream intervals to a binary file of INTERVAL_RECORD entries.
+
+    Returns:
+        int: The number of intervals written.
+    """
+    count = 0
+    with Path(path).open("wb") as f:
+        for chunk in batched(intervals, 65_536, strict=False):
+            f.write(b"".join(INTERVAL_RECORD.pack(start, end) for start, end in chunk))
+            count += len(chunk)
+    return count
+
+
+def iter_interval_file(
+    path: str | Path, chunk_records: int = 65_536
+) -> Iterator[tuple[int, int]]:
+    """Stream the intervals of a file written by `write_interval_file`."""
+    with Path(path).open("rb") as f:
+        while chunk := f.read(chunk_records * INTERVAL_RECORD.size):
+            yield from INTERVAL_RECORD.iter_unpack(chunk)
+
+
+def _padded(size: int) -> int:
+    return -(-size // 8) * 8
+
+
+def _index_size(n_blocks: int, data_size: int) -> int:
+    return INDEX_HEADER.size + _padded(data_size) + 3 * 8 * n_blocks
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf: memoryview, pos: int) -> tuple[int, int]:
+    # Returns the decoded value and the position after it.
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _index_checksum(header: bytes | memoryview, payload_crc: int) -> int:
+    """Extend the payload CRC32 over `header` with the checksum slot zeroed."""
+    header = bytearray(header)
+    header[_INDEX_CHECKSUM_SLOT] = bytes(4)
+    return zlib.crc32(header, payload_crc)
+
+
+def write_range_index(
+    path: str | Path,
+    intervals: Iterable[tuple[int, int] | list[int]],
+    block_size: int = 16,
+) -> int:
+    """Stream sorted, disjoint intervals to a range index for `MultiRange.open`.
+
+    Each block of `block_size` intervals is stored as varint gaps and lengths
+    relative to the block's first start, so the file is usually a few bytes
+    per interval. Bounds and the covered total must fit in 64 bits.
+
+    Returns:
+        int: The number of intervals written.
+
+    Raises:
+        ValueError: If the intervals are empty, unsorted or overlapping.
+    """
+    if block_size <= 0:
+        raise ValueError("Block size must be positive")
+
+    block_starts, block_prefix, block_offsets = array("q"), array("q"), array("q")
+    count = data_size = total = 0
+    checksum = 0
+    end = None
+    with Path(path).open("wb") as f:
+        f.write(bytes(INDEX_HEADER.size))
+        for chunk in batched(intervals, block_size, strict=False):
+            block = bytearray()
+            block_starts.append(chunk[0][0])
+            block_prefix.append(total)
+            block_offsets.append(data_size)
+            prev_end = chunk[0][0]
+            for start, stop in chunk:
+                if start >= stop or (end is not None and start < end):
+                    raise ValueError("Intervals must be non-empty, sorted and disjoint")
+                _write_varint(block, start - prev_end)
+                _write_varint(block, stop - start)
+                prev_end = end = stop
+                total += stop - start
+            f.write(block)
+            checksum = zlib.crc32(block, checksum)
+            data_size += len(block)
+            count += len(chunk)
+
+        tail = bytes(_padded(data_size) - data_size)
+        f.write(tail)
+        checksum = zlib.crc32(tail, checksum)
+        for column in (block_starts, block_prefix, block_offsets):
+            raw = column.tobytes()
+            f.write(raw)
+            checksum = zlib.crc32(raw, checksum)
+
+        fields = (
+            INDEX_MAGIC,
+            INDEX_VERSION,
+            block_size,
+            count,
+            len(block_starts),
+            data_size,
+            total,
+        )
+        checksum = _index_checksum(INDEX_HEADER.pack(*fields, 0), checksum)
+        f.seek(0)
+        f.write(INDEX_HEADER.pack(*fields, checksum))
+    return count
+
+
+def external_optimize_ranges(
+    lines: Iterable[str],
+    out_path: str | Path,
+    chunk_size: int = 1_000_000,
+    tmp_dir: str | Path | None = None,
+    max_open_runs: int = 128,
+) -> int:
+    """Merge range lines that do not fit in memory into a sorted interval file.
+
+    Lines are parsed in chunks of `chunk_size`; each chunk is merged with
+    `optimize_ranges` and spilled to a temporary run file. The runs are then
+    k-way merged with `heapq.merge`, coalescing on the fly, and streamed to
+    `out_path`, which `MultiRange.load` can read without re-sorting.
+
+    At most `max_open_runs` run files are read at once. With more runs than
+    that, groups of runs are first merged into intermediate run files, pass
+    after pass, until the final merge fits.
+
+    Returns:
+        int: The number of merged intervals written.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    if max_open_runs < 2:
+        raise ValueError("max_open_runs must be at least 2")
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        n_files = 0
+
+        def new_run() -> Path:
+            nonlocal n_files
+            n_files += 1
+            return Path(tmp) / f"run{n_files - 1:06d}.bin"
+
+        def merge_runs(group: list[Path]) -> Iterator[tuple[int, int]]:
+            return coalesce_intervals(
+                heapq.merge(*(iter_interval_file(run) for run in group))
+            )
+
+        runs: list[Path] = []
+        for chunk in batched(
+            (line for line in lines if line.strip()), chunk_size, strict=False
+        ):
+            ranges = [r for r in map(parse_range_line, chunk) if r[0] < r[1]]
+            run = new_run()
+            write_interval_file(run, MultiRange.optimize_ranges(ranges))
+            runs.append(run)
+
+        while len(runs) > max_open_runs:
+            next_runs: list[Path] = []
+            for group in batched(runs, max_open_runs, strict=False):
+                run = new_run()
+                write_interval_file(run, merge_runs(list(group)))
+                next_runs.append(run)
+                for old in group:
+                    old.unlink()
+            runs = next_runs
+
+        return write_interval_file(out_path, merge_runs(runs))
+
+
+def benchmark_membership(
+    n_ranges: int = 10_000, n_ids: int = 100_000, number: int = 1
+) -> dict[str, float]:
+    """Time membership of random IDs with a linear scan and with bisect.
+
+    Returns:
+        dict[str, float]: Average seconds for all `n_ids` lookups, per method.
+    """
+    rng = random.Random(0)
+    span = 100 * n_ranges
+    starts = rng.sample(range(span), n_ranges)
+    ranges = [[s, s + rng.randint(1, 50)] for s in starts]
+    ids = [rng.randrange(span) for _ in range(n_ids)]
+    multi_range = MultiRange(ranges)
+
+    def linear() -> int:
+        objects = multi_range.range_objects
+        return sum(1 for pid in ids if any(pid in r for r in objects))
+
+    def bisected() -> int:
+        return sum(1 for pid in ids if pid in multi_range)
+
+    return {
+        "linear": time_callable(linear, number=number),
+        "bisect": time_callable(bisected, number=number),
+    }
+
+
+def benchmark_parallel_optimize(
+    n_ranges: int = 1_000_000, max_workers: int | None = None, number: int = 1
+) -> dict[int, float]:
+    """Time `optimize_ranges_parallel` on random ranges with 1..N workers,
+    including pool start-up and shard transfer.
+
+    Returns:
+        dict[int, float]: Average seconds per merge, keyed by worker count.
+    """
+    rng = random.Random(0)
+    span = 20 * n_ranges
+    ranges = []
+    for _ in range(n_ranges):
+        start = rng.randrange(span)
+        ranges.append([start, start + rng.randint(1, 10)])
+
+    expected = MultiRange.optimize_ranges(ranges)
+    timings: dict[int, float] = {}
+    for workers in range(1, (max_workers or os.cpu_count() or 1) + 1):
+        if (
+            MultiRange.optimize_ranges_parallel(ranges, workers, min_shard=1)
+            != expected
+        ):
+            raise RuntimeError("Parallel merge disagrees with the serial merge")
+        timings[workers] = time_callable(
+            MultiRange.optimize_ranges_parallel, ranges, workers, 1, number=number
+        )
+    return timings
+
+
+def benchmark_storage_memory(n_intervals: int = 1_000_000) -> dict[str, int]:
+    """Peak bytes allocated while building each representation from
+    `n_intervals` disjoint intervals (the input list itself is excluded)."""
+    ranges = [[3 * i, 3 * i + 2] for i in range(n_intervals)]
+    _, multi_range_peak = peak_memory_callable(MultiRange, ranges)
+    _, compact_peak = peak_memory_callable(CompactMultiRange, ranges, True)
+    return {"MultiRange": multi_range_peak, "CompactMultiRange": compact_peak}
+
+
+def benchmark_bitmap_intersection(
+    n_ids: int = 10_000_000, n_ranges: int = 1_000, number: int = 1
+) -> dict[str, dict[str, float]]:
+    """Compare a `set` of IDs with a RoaringBitmap for the part 1 count.
+
+    The IDs are every other integer of a dense span. Peak bytes are measured
+    while building each structure; seconds are per count against `n_ranges`
+    random ranges.
+
+    Returns:
+        dict[str, dict[str, float]]: "peak_bytes" and "seconds" per structure.
+    """
+    rng = random.Random(0)
+    span = 2 * n_ids
+    ranges = []
+    for _ in range(n_ranges):
+        start = rng.randrange(span)
+        ranges.append([start, start + rng.randint(1, span // n_ranges)])
+    multi_range = MultiRange(ranges)
+    ids = range(0, span, 2)
+
+    id_set, set_peak = peak_memory_callable(set, ids)
+    bitmap, bitmap_peak = peak_memory_callable(RoaringBitmap, ids, True)
+    if multi_range.count_contained(id_set) != bitmap.intersection_count(multi_range):
+        raise RuntimeError("Bitmap count disagrees with the set count")
+
+    return {
+        "set": {
+            "peak_bytes": set_peak,
+            "seconds": time_callable(
+                multi_range.count_contained, id_set, number=number
+            ),
+        },
+        "bitmap": {
+            "peak_bytes": bitmap_peak,
+            "seconds": time_callable(
+                bitmap.intersection_count, multi_range, number=number
+            ),
+        },
+    }
+
 
 def main() -> None:
     data_path: Path = (
@@ -74,21 +1282,19 @@ def main() -> None:
     ranges: list[str] = data[:sep_index]
     product_ids: list[str] = data[sep_index + 1 :]
 
-    # ranges is a string encoding of the form f"{lower}-{upper}" for each range.
-    ranges: list[list[int]] = [[int(x) for x in r.split("-")] for r in ranges]
-    product_ids: set[int] = set(map(int, product_ids))
+    # ranges is a string encoding of the form f"{lower}-{upper}" for each range,
+    # inclusive of both ends; parse_range_line makes them half-open.
+    ranges: list[list[int]] = [parse_range_line(r) for r in ranges]
+    product_ids: RoaringBitmap = RoaringBitmap(map(int, product_ids))
 
     pprint(ranges)
     pprint(product_ids)
 
-    # Adjust the ranges to be inclusive of both ends.
-    ranges: list[list[int]] = [[r[0], r[1] + 1] for r in ranges]
-
     ranges: list[list[int]] = MultiRange.optimize_ranges(ranges)
 
-    multi_range: MultiRange = MultiRange(ranges)
+    multi_range: MultiRange = MultiRange(ranges, merged=True)
 
-    num_invalid: int = sum(1 for pid in product_ids if pid in multi_range)
+    num_invalid: int = product_ids.intersection_count(multi_range)
 
     print(f"Solution to part 1: {num_invalid}")
 
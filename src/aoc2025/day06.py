@@ -1,12 +1,46 @@
 import math
-from collections.abc import Callable, Iterable
+import os
+import random
+import tempfile
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import accumulate, chain
 from pathlib import Path
 from pprint import pprint
-from typing import TypeVar
+from typing import BinaryIO, TypeVar
+
+from aoc2025.utils.benchmark import peak_memory_callable, time_callable
+
+try:
+    import numpy as np
+except ImportError:  # Without NumPy, parsing and reductions stay in Python.
+    np = None
 
 T = TypeVar("T")
 ReduceFn = Callable[[Iterable[T]], T]
 
+# One worksheet problem: its operator, the number in each row (part 1) and the
+# number in each column, left to right (part 2).
+Problem = tuple[str, list[int], list[int]]
+
+SPACE, ZERO, NINE = ord(" "), ord("0"), ord("9")
+OPERATORS = frozenset(b"+*")
+
+# Numbers with more digits than this may not fit in int64.
+INT64_DIGITS = 18
+
+# `math.prod` reductions switch to a balanced product tree once there are at
+# least this many operands totalling at least this many bits. Below that, the
+# left-to-right product is faster; measured on 4- to 100-digit operands, the
+# crossover sits near 8k total bits whatever the operand size.
+PRODUCT_TREE_MIN_COUNT = 16
+PRODUCT_TREE_MIN_BITS = 8_192
+
+# Column results are computed in int64 only when their magnitude is provably
+# below this bound; the bit below the sign absorbs float rounding in the check.
+INT64_SAFE_BITS = 62
+
 
 class MatrixReduce:
     """A class for performing matrix reduction operations."""
@@ -14,6 +48,8 @@ class MatrixReduce:
     @staticmethod
     def is_valid_matrix(matrix: list[list[T]]) -> bool:
         """Check if a matrix is valid."""
+        if np is not None and isinstance(matrix, np.ndarray):
+            return matrix.ndim == 2 and matrix.size > 0
         if not matrix or not all(len(row) == len(matrix[0]) for row in matrix):
             return False
         return True
@@ -31,13 +67,21 @@ class MatrixReduce:
 
         if not MatrixReduce.is_valid_matrix(matrix):
             raise ValueError("Matrix must be valid")
+        reduce_fn = _with_product_tree(reduce_fn)
         return reduce_fn((reduce_fn(row) for row in matrix))
 
     @staticmethod
     def row_reduce(
         matrix: list[list[T]], reduce_fns: list[ReduceFn], ragged: bool = False
     ) -> list[T]:
-        """Reduce each row of a matrix to a single value."""
+        """Reduce each row of a matrix to a single value.
+
+        A RaggedMatrix is reduced with `RaggedMatrix.reduce`. Here and in the
+        other reductions, `math.prod` is replaced by `adaptive_prod`.
+        """
+
+        if isinstance(matrix, RaggedMatrix):
+            return matrix.reduce(reduce_fns)
 
         if ragged and len(reduce_fns) != len(matrix):
             raise ValueError("Number of reduce functions must match number of rows")
@@ -46,21 +90,271 @@ class MatrixReduce:
             raise ValueError("Matrix must be valid")
 
         return [
-            reduce_fn(row) for row, reduce_fn in zip(matrix, reduce_fns, strict=True)
+            reduce_fn(row)
+            for row, reduce_fn in zip(
+                matrix,
+                _with_product_trees(reduce_fns, max(map(len, matrix), default=0)),
+                strict=True,
+            )
         ]
 
     @staticmethod
-    def column_reduce(matrix: list[list[T]], reduce_fns: list[ReduceFn]) -> list[T]:
-        """Reduce each column of a matrix to a single value."""
+    def column_reduce(
+        matrix: list[list[T]], reduce_fns: list[ReduceFn], backend: str = "auto"
+    ) -> list[T]:
+        """Reduce each column of a matrix to a single value.
+
+        Args:
+            matrix (list[list[T]]): The matrix to reduce.
+            reduce_fns (list[ReduceFn]): One reduction per column.
+            backend (str): "python", "array" for the int64 array backend (see
+                `column_reduce_array`), or "auto" to use the array backend
+                for NumPy matrices only. Converting a list matrix to an array
+                costs more than the Python reduction saves.
+        """
         if not MatrixReduce.is_valid_matrix(matrix):
             raise ValueError("Matrix must be valid")
+        if backend not in ("auto", "python", "array"):
+            raise ValueError(f"Unknown backend {backend!r}")
+        is_array = np is not None and isinstance(matrix, np.ndarray)
+        if backend == "array" or (backend == "auto" and is_array):
+            reduced = MatrixReduce.column_reduce_array(matrix, reduce_fns)
+            if reduced is not None:
+                return reduced
+        if is_array:
+            matrix = matrix.tolist()
         return [
             reduce_fn(col)
             for col, reduce_fn in zip(
-                zip(*matrix, strict=True), reduce_fns, strict=True
+                zip(*matrix, strict=True),
+                _with_product_trees(reduce_fns, len(matrix)),
+                strict=True,
             )
         ]
 
+    @staticmethod
+    def column_reduce_array(
+        matrix: "list[list[int]] | np.ndarray", reduce_fns: list[ReduceFn]
+    ) -> list[int] | None:
+        """Column-wise `sum` and `math.prod` over the matrix as an int64 array.
+
+        Every column is summed and multiplied in bulk and keeps the result of
+        its own operator. A column whose result could overflow int64, judged
+        from the bit lengths of its entries, is re-reduced exactly with Python
+        ints.
+
+        Returns:
+            list[int] | None: The reductions, or None if NumPy is missing, the
+            entries are not all int64 integers, or a reduction is neither `sum`
+            nor `math.prod`.
+        """
+        if len(reduce_fns) != len(matrix[0]):
+            raise ValueError("Number of reduce functions must match number of columns")
+        if np is None:
+            return None
+        is_prod = _product_mask(reduce_fns)
+        if is_prod is None:
+            return None
+        array = matrix if isinstance(matrix, np.ndarray) else np.array(matrix)
+        if array.dtype.kind != "i":  # Python ints past int64 give an object array
+            return None
+
+        bits = _magnitude_bits(array)
+        safe = _int64_safe(is_prod, bits.sum(axis=0), bits.max(axis=0), len(array))
+
+        # Both reductions over every column beat gathering the columns of each
+        # operator; wrapped results in unsafe columns are replaced below.
+        out = np.where(is_prod, array.prod(axis=0), array.sum(axis=0))
+        reduced: list[int] = out.tolist()
+        for c in np.flatnonzero(~safe).tolist():
+            reduced[c] = _with_product_tree(reduce_fns[c])(array[:, c].tolist())
+        return reduced
+
+
+def balanced_prod(values: Iterable[int]) -> int:
+    """Multiply integers pairwise, level by level, as a balanced product tree.
+
+    Operands in each multiplication stay about the same size, which suits
+    CPython's Karatsuba multiplication far better than a running product
+    that grows by one small factor at a time.
+    """
+    level = list(values)
+    if not level:
+        return 1
+    while len(level) > 1:
+        paired = [a * b for a, b in zip(level[::2], level[1::2], strict=False)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def adaptive_prod(values: Iterable[T]) -> T:
+    """`math.prod`, switching to `balanced_prod` for long lists of wide ints."""
+    values = values if isinstance(values, list) else list(values)
+    if len(values) >= PRODUCT_TREE_MIN_COUNT:
+        try:
+            bits = sum(map(int.bit_length, values))
+        except TypeError:  # Not all Python ints.
+            bits = 0
+        if bits >= PRODUCT_TREE_MIN_BITS:
+            return balanced_prod(values)
+    return math.prod(values)
+
+
+_PRODUCT_TREES: dict[ReduceFn, ReduceFn] = {math.prod: adaptive_prod}
+
+
+def _with_product_tree(reduce_fn: ReduceFn) -> ReduceFn:
+    return _PRODUCT_TREES.get(reduce_fn, reduce_fn)
+
+
+def _with_product_trees(reduce_fns: list[ReduceFn], longest: int) -> Iterable[ReduceFn]:
+    # Reductions over at most `longest` operands. Short ones keep math.prod
+    # and skip the per-call check; otherwise a C-level map swaps it out.
+    if longest < PRODUCT_TREE_MIN_COUNT:
+        return reduce_fns
+    return map(_PRODUCT_TREES.get, reduce_fns, reduce_fns)
+
+
+def _product_mask(reduce_fns: list[ReduceFn]) -> "np.ndarray | None":
+    # True for `math.prod`, False for `sum`; None if any other function is used.
+    try:
+        codes = bytes(map({sum: 0, math.prod: 1}.__getitem__, reduce_fns))
+    except (KeyError, TypeError):
+        return None
+    return np.frombuffer(codes, dtype=bool)
+
+
+def _magnitude_bits(values: "np.ndarray") -> "np.ndarray":
+    # log2 of each magnitude, with zeros counted as 0 bits (conservative).
+    return np.log2(np.maximum(np.abs(values.astype(np.float64)), 1.0))
+
+
+def _int64_safe(
+    is_prod: "np.ndarray",
+    bits_total: "np.ndarray",
+    bits_max: "np.ndarray",
+    count: "np.ndarray | int",
+) -> "np.ndarray":
+    # Whether each product (bounded by its total bits) or sum (bounded by its
+    # largest term times the term count) provably fits in int64.
+    bound = np.where(is_prod, bits_total, bits_max + np.log2(np.maximum(count, 1)))
+    return bound < INT64_SAFE_BITS
+
+
+class RaggedMatrix:
+    """Rows of varying length stored CSR-style: every value in one flat buffer,
+    with row i spanning values[offsets[i] : offsets[i + 1]].
+
+    Values are an int64 NumPy array when NumPy is installed and they fit, and
+    a list of Python ints otherwise.
+    """
+
+    __slots__ = ("values", "offsets")
+
+    def __init__(
+        self,
+        values: "list[int] | np.ndarray",
+        offsets: "list[int] | np.ndarray",
+    ) -> None:
+        if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(values):
+            raise ValueError("Offsets must run from 0 to the number of values")
+        if np is not None and isinstance(offsets, np.ndarray):
+            decreasing = bool(np.any(offsets[1:] < offsets[:-1]))
+        else:
+            decreasing = any(
+                lo > hi for lo, hi in zip(offsets, offsets[1:], strict=False)
+            )
+        if decreasing:
+            raise ValueError("Offsets must be non-decreasing")
+        self.values: list[int] | np.ndarray = values
+        self.offsets: list[int] | np.ndarray = offsets
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list[int]]) -> "RaggedMatrix":
+        rows = list(rows)
+        values: list[int] | np.ndarray = list(chain.from_iterable(rows))
+        offsets: list[int] | np.ndarray = [0, *accumulate(map(len, rows))]
+        if np is not None:
+            try:
+                values = np.array(values, dtype=np.int64)
+                offsets = np.array(offsets, dtype=np.int64)
+            except OverflowError:
+                pass
+        return cls(values, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> list[int]:
+        row = self.values[self.offsets[i] : self.offsets[i + 1]]
+        return row if isinstance(row, list) else row.tolist()
+
+    def __iter__(self) -> Iterator[list[int]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"RaggedMatrix({len(self)} rows, {len(self.values)} values)"
+
+    def tolist(self) -> list[list[int]]:
+        return list(self)
+
+    def longest_row(self) -> int:
+        if len(self) == 0:
+            return 0
+        if np is not None and isinstance(self.offsets, np.ndarray):
+            return int(np.diff(self.offsets).max())
+        return max(
+            hi - lo for lo, hi in zip(self.offsets, self.offsets[1:], strict=False)
+        )
+
+    def reduce(self, reduce_fns: list[ReduceFn]) -> list[int]:
+        """Reduce each row with its own function.
+
+        For int64 values and only `sum` and `math.prod`, every row is summed
+        and multiplied at once with `reduceat`. Empty rows give 0 and 1. Rows
+        whose result could overflow int64 are re-reduced with Python ints, as
+        is everything in the list-backed case.
+        """
+        if len(reduce_fns) != len(self):
+            raise ValueError("Number of reduce functions must match number of rows")
+        values, offsets = self.values, self.offsets
+        is_prod = None
+        if np is not None and isinstance(values, np.ndarray):
+            is_prod = _product_mask(reduce_fns)
+        if is_prod is None:
+            return [
+                reduce_fn(row)
+                for row, reduce_fn in zip(
+                    self,
+                    _with_product_trees(reduce_fns, self.longest_row()),
+                    strict=True,
+                )
+            ]
+
+        counts = np.diff(offsets)
+        filled = counts > 0
+        # Empty rows are skipped, so the starts of the others tile `values`.
+        starts = np.asarray(offsets[:-1])[filled]
+        sums = np.zeros(len(self), dtype=np.int64)
+        prods = np.ones(len(self), dtype=np.int64)
+        bits_total = np.zeros(len(self))
+        bits_max = np.zeros(len(self))
+        if len(starts):
+            bits = _magnitude_bits(values)
+            sums[filled] = np.add.reduceat(values, starts)
+            prods[filled] = np.multiply.reduceat(values, starts)
+            bits_total[filled] = np.add.reduceat(bits, starts)
+            bits_max[filled] = np.maximum.reduceat(bits, starts)
+
+        reduced: list[int] = np.where(is_prod, prods, sums).tolist()
+        unsafe = ~_int64_safe(is_prod, bits_total, bits_max, counts)
+        for i in np.flatnonzero(unsafe).tolist():
+            reduced[i] = _with_product_tree(reduce_fns[i])(self[i])
+        return reduced
+
 
 def transposed_parsing(data: list[str]) -> list[list[int]]:
     """Parse data constructing numbers column-wise instead of row-wise. Produces
@@ -85,6 +379,534 @@ def transposed_parsing(data: list[str]) -> list[list[int]]:
     return matrix
 
 
+class ColumnScanner:
+    """Scan a worksheet column by column, emitting each problem once its
+    trailing blank column is seen.
+
+    Rows are read as byte buffers, so no per-character strings or tuples are
+    made. The state of an unfinished problem is kept between `feed` calls,
+    so a sheet can be scanned in column windows with numbers split across
+    window edges.
+    """
+
+    def __init__(self, n_rows: int) -> None:
+        self.n_rows: int = n_rows
+        self._reset()
+
+    def _reset(self) -> None:
+        self.row_numbers: list[int] = [0] * self.n_rows
+        self.row_seen: list[bool] = [False] * self.n_rows
+        self.column_numbers: list[int] = []
+        self.op: int | None = None
+
+    def _emit(self) -> Problem:
+        if self.op is None:
+            raise ValueError("Problem has no operator")
+        if not all(self.row_seen):
+            raise ValueError("Problem is missing a number in some row")
+        problem = (chr(self.op), self.row_numbers, self.column_numbers)
+        self._reset()
+        return problem
+
+    def feed(
+        self, rows: Sequence[bytes | memoryview], ops: bytes | memoryview
+    ) -> list[Problem]:
+        """Scan the next columns, given as one buffer per number row and one
+        for the operator row. Short buffers are treated as blank-padded to
+        the widest one.
+
+        Returns:
+            list[Problem]: The problems completed within these columns.
+        """
+        if len(rows) != self.n_rows:
+            raise ValueError("Number of rows does not match the scanner")
+        width = max([len(ops), *map(len, rows)])
+        row_numbers, row_seen = self.row_numbers, self.row_seen
+        done: list[Problem] = []
+        for c in range(width):
+            column = 0
+            seen = False
+            for r, row in enumerate(rows):
+                byte = row[c] if c < len(row) else SPACE
+                if ZERO <= byte <= NINE:
+                    digit = byte - ZERO
+                    row_numbers[r] = row_numbers[r] * 10 + digit
+                    row_seen[r] = True
+                    column = column * 10 + digit
+                    seen = True
+                elif byte != SPACE:
+                    raise ValueError(
+                        f"Unexpected byte {bytes([byte])!r} in a number row"
+                    )
+
+            op = ops[c] if c < len(ops) else SPACE
+            if op != SPACE:
+                if op not in OPERATORS or self.op is not None:
+                    raise ValueError(f"Unexpected operator {bytes([op])!r}")
+                self.op = op
+
+            if seen:
+                self.column_numbers.append(column)
+            elif op == SPACE and self.column_numbers:
+                # A blank column closes the current problem.
+                done.append(self._emit())
+                row_numbers, row_seen = self.row_numbers, self.row_seen
+        return done
+
+    def finish(self) -> list[Problem]:
+        """Emit the last problem if the sheet did not end in a blank column."""
+        if not self.column_numbers and self.op is None:
+            return []
+        return [self._emit()]
+
+
+def split_rows(raw: bytes) -> list[memoryview]:
+    """Split a worksheet into zero-copy row views, dropping line endings and
+    blank trailing lines."""
+    view = memoryview(raw)
+    rows: list[memoryview] = []
+    start = 0
+    while start < len(raw):
+        end = raw.find(b"\n", start)
+        if end == -1:
+            end = len(raw)
+        stop = end - 1 if end > start and raw[end - 1] == ord("\r") else end
+        rows.append(view[start:stop])
+        start = end + 1
+    while rows and not bytes(rows[-1]).strip():
+        rows.pop()
+    return rows
+
+
+def _parse_worksheet_array(
+    rows: Sequence[bytes | memoryview], as_array: bool = False
+) -> "tuple[list[list[int]] | np.ndarray, list[list[int]] | RaggedMatrix, list[str]] | None":
+    # Vectorized parse_worksheet over a byte grid, with no loop over columns.
+    # Returns None when a number may not fit in int64 or the sheet is
+    # malformed, leaving both to the ColumnScanner.
+    n_rows = len(rows) - 1
+    if n_rows > INT64_DIGITS:
+        return None
+    width = max(map(len, rows))
+    grid = np.full((len(rows), width), SPACE, dtype=np.uint8)
+    for r, row in enumerate(rows):
+        grid[r, : len(row)] = np.frombuffer(row, dtype=np.uint8)
+
+    body, ops = grid[:-1], grid[-1]
+    is_digit = (body >= ZERO) & (body <= NINE)
+    if not np.all(is_digit | (body == SPACE)):
+        return None
+    has_digit = is_digit.any(axis=0)
+    has_op = ops != SPACE
+
+    # Problems are the maximal runs of non-blank columns.
+    filled = np.concatenate(([False], has_digit | has_op, [False]))
+    starts = np.flatnonzero(filled[1:-1] & ~filled[:-2])
+    n_problems = len(starts)
+    op_codes = ops[has_op]
+    if len(op_codes) != n_problems or not np.all(
+        (op_codes == ord("+")) | (op_codes == ord("*"))
+    ):
+        return None
+    if n_problems == 0:
+        if as_array:
+            empty = RaggedMatrix(np.zeros(0, dtype=np.int64), np.zeros(1, np.int64))
+            return np.zeros((n_rows, 0), dtype=np.int64), empty, []
+        return [[] for _ in range(n_rows)], [], []
+    if np.any(np.add.reduceat(has_op, starts) != 1):
+        return None
+    first = np.zeros(width, dtype=np.int64)
+    first[starts] = 1
+    problem_of = np.cumsum(first) - 1
+
+    # Part 1, a row at a time: each digit is worth 10 ** (digits after it in
+    # its problem).
+    pow10 = np.power(10, np.arange(INT64_DIGITS, dtype=np.int64))
+    row_values: list[np.ndarray] = []
+    for r in range(n_rows):
+        cols = np.flatnonzero(is_digit[r])
+        counts = np.bincount(problem_of[cols], minlength=n_problems)
+        if counts.min() == 0 or counts.max() > INT64_DIGITS:
+            return None
+        ends = np.cumsum(counts)
+        place = ends[problem_of[cols]] - np.arange(1, len(cols) + 1)
+        values = (body[r, cols] - np.uint8(ZERO)).astype(np.int64) * pow10[place]
+        row_values.append(np.add.reduceat(values, ends - counts))
+    matrix = np.stack(row_values) if as_array else [v.tolist() for v in row_values]
+
+    # Part 2: fold the rows into per-column numbers, top digit first.
+    columns = np.zeros(width, dtype=np.int64)
+    for r in range(n_rows):
+        digit = body[r].astype(np.int64) - ZERO
+        columns = np.where(is_digit[r], columns * 10 + digit, columns)
+    bounds = np.cumsum(np.bincount(problem_of[has_digit], minlength=n_problems))
+    if as_array:
+        ragged = RaggedMatrix(columns[has_digit], np.concatenate(([0], bounds)))
+    else:
+        column_values = columns[has_digit].tolist()
+        lows = [0, *bounds[:-1].tolist()]
+        ragged = [
+            column_values[lo:hi] for lo, hi in zip(lows, bounds.tolist(), strict=True)
+        ]
+
+    return matrix, ragged, list(op_codes.tobytes().decode())
+
+
+def parse_worksheet(
+    raw: bytes, as_array: bool = False
+) -> "tuple[list[list[int]] | np.ndarray, list[list[int]] | RaggedMatrix, list[str]]":
+    """Parse both readings of a worksheet in a single pass over its bytes.
+
+    With `as_array`, the part 1 matrix is returned as an int64 NumPy array
+    when every number fits, ready for the array backend of `column_reduce`,
+    and the part 2 matrix is returned as a RaggedMatrix.
+
+    Returns:
+        tuple: The row-wise matrix for part 1 (one row per number row, one
+        column per problem), the column-wise ragged matrix for part 2 (one row
+        per problem) and the operators.
+    """
+    return parse_rows(split_rows(raw), as_array)
+
+
+def parse_rows(
+    rows: Sequence[bytes | memoryview], as_array: bool = False
+) -> "tuple[list[list[int]] | np.ndarray, list[list[int]] | RaggedMatrix, list[str]]":
+    """`parse_worksheet` for a sheet already split into row buffers, the
+    operator row last."""
+    if len(rows) < 2:
+        raise ValueError("Worksheet needs number rows and an operator row")
+    if np is not None:
+        parsed = _parse_worksheet_array(rows, as_array)
+        if parsed is not None:
+            return parsed
+
+    scanner = ColumnScanner(len(rows) - 1)
+    problems = scanner.feed(rows[:-1], rows[-1]) + scanner.finish()
+
+    matrix: list[list[int]] = [[] for _ in range(scanner.n_rows)]
+    for _, row_numbers, _ in problems:
+        for row, value in zip(matrix, row_numbers, strict=True):
+            row.append(value)
+    ragged = [column_numbers for _, _, column_numbers in problems]
+    operators = [op for op, _, _ in problems]
+    if as_array:
+        return matrix, RaggedMatrix.from_rows(ragged), operators
+    return matrix, ragged, operators
+
+
+def reduce_rows(rows: Sequence[bytes | memoryview]) -> tuple[int, int]:
+    """Both answers (the sums of the part 1 and part 2 problem results) for a
+    sheet given as row buffers, the operator row last."""
+    matrix, ragged, operators = parse_rows(rows, as_array=True)
+    if not operators:
+        return 0, 0
+    reduce_fns: list[ReduceFn] = [math.prod if op == "*" else sum for op in operators]
+    return (
+        sum(MatrixReduce.column_reduce(matrix, reduce_fns)),
+        sum(MatrixReduce.row_reduce(ragged, reduce_fns, ragged=True)),
+    )
+
+
+def _is_blank_column(rows: Sequence[bytes | memoryview], c: int) -> bool:
+    return all(c >= len(row) or row[c] == SPACE for row in rows)
+
+
+def split_column_blocks(
+    rows: Sequence[bytes | memoryview], n_blocks: int
+) -> list[tuple[int, int]]:
+    """Split the columns into up to `n_blocks` contiguous [lo, hi) blocks of
+    similar width, cutting only at blank columns so no problem is split."""
+    width = max(map(len, rows))
+    cuts = [0]
+    for k in range(1, n_blocks):
+        c = max(width * k // n_blocks, cuts[-1])
+        while c < width and not _is_blank_column(rows, c):
+            c += 1
+        if c >= width:
+            break
+        if c > cuts[-1]:
+            cuts.append(c)
+    cuts.append(width)
+    return list(zip(cuts, cuts[1:], strict=False))
+
+
+def reduce_rows_parallel(
+    rows: Sequence[bytes | memoryview],
+    workers: int | None = None,
+    min_block: int = 100_000,
+) -> tuple[int, int]:
+    """Process-pool version of `reduce_rows` with identical output.
+
+    The columns are split into one block per worker at blank columns, and each
+    worker gets only the byte slices of its block, one per row. Workers return
+    their (part 1, part 2) sums, which are added up. Sheets too narrow to give
+    every worker `min_block` columns are reduced serially.
+    """
+    width = max(map(len, rows))
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, width // max(min_block, 1))
+    if workers <= 1:
+        return reduce_rows(rows)
+
+    blocks = [
+        [bytes(row[lo:hi]) for row in rows]
+        for lo, hi in split_column_blocks(rows, workers)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        sums = list(pool.map(reduce_rows, blocks))
+    return sum(p1 for p1, _ in sums), sum(p2 for _, p2 in sums)
+
+
+def row_extents(path: str | Path, chunk_size: int = 1 << 20) -> list[tuple[int, int]]:
+    """Byte [start, stop) of each row of a worksheet file, found by streaming it
+    in chunks. Line endings and blank trailing lines are dropped, as in
+    `split_rows`."""
+    extents: list[tuple[int, int]] = []
+    with Path(path).open("rb") as f:
+        start = offset = 0
+        last = b""
+        while chunk := f.read(chunk_size):
+            pos = chunk.find(b"\n")
+            while pos != -1:
+                end = offset + pos
+                before = chunk[pos - 1 : pos] if pos else last
+                extents.append(
+                    (start, end - 1 if before == b"\r" and end > start else end)
+                )
+                start = end + 1
+                pos = chunk.find(b"\n", pos + 1)
+            offset += len(chunk)
+            last = chunk[-1:]
+        if start < offset:
+            extents.append((start, offset))
+
+        while extents and _is_blank_extent(f, *extents[-1], chunk_size):
+            extents.pop()
+    return extents
+
+
+def _is_blank_extent(f: BinaryIO, start: int, stop: int, chunk_size: int) -> bool:
+    f.seek(start)
+    while start < stop:
+        chunk = f.read(min(chunk_size, stop - start))
+        if chunk.strip():
+            return False
+        start += len(chunk)
+    return True
+
+
+def reduce_file_streaming(path: str | Path, window: int = 1 << 20) -> tuple[int, int]:
+    """`reduce_rows` for a worksheet file without reading it into memory.
+
+    One file cursor per row starts at that row's offset, and the cursors
+    advance together, `window` bytes at a time. Each round reduces every
+    problem that ends before the last blank column seen so far. The columns
+    after it, which may hold a problem cut off at the window edge, carry over
+    to the next round. Memory is O(rows x (window + widest problem)).
+    """
+    if window <= 0:
+        raise ValueError("Window must be positive")
+    extents = row_extents(path)
+    if len(extents) < 2:
+        raise ValueError("Worksheet needs number rows and an operator row")
+
+    part1 = part2 = 0
+    with ExitStack() as stack:
+        cursors = [stack.enter_context(Path(path).open("rb")) for _ in extents]
+        for cursor, (start, _) in zip(cursors, extents, strict=True):
+            cursor.seek(start)
+        remaining = [stop - start for start, stop in extents]
+        pending: list[bytes] = [b""] * len(extents)
+
+        while any(remaining):
+            for r, cursor in enumerate(cursors):
+                data = cursor.read(min(window, remaining[r]))
+                remaining[r] -= len(data)
+                pending[r] += data
+
+            cut = max(map(len, pending))
+            while cut > 0 and not _is_blank_column(pending, cut - 1):
+                cut -= 1
+            if cut == 0:
+                continue  # No complete problem yet.
+            done = reduce_rows([row[:cut] for row in pending])
+            part1 += done[0]
+            part2 += done[1]
+            pending = [row[cut:] for row in pending]
+
+        done = reduce_rows(pending)
+    return part1 + done[0], part2 + done[1]
+
+
+def random_worksheet(
+    n_problems: int, n_rows: int = 4, max_digits: int = 4, seed: int = 0
+) -> bytes:
+    """A worksheet of `n_problems` random problems in the puzzle layout, each
+    padded to its widest number and aligned left or right at random."""
+    rng = random.Random(seed)
+    lines: list[list[str]] = [[] for _ in range(n_rows + 1)]
+    for _ in range(n_problems):
+        numbers = [str(rng.randint(1, 10**max_digits - 1)) for _ in range(n_rows)]
+        # Ordering by length keeps each column's digits contiguous.
+        numbers.sort(key=len, reverse=rng.random() < 0.5)
+        width = max(map(len, numbers))
+        align = str.ljust if rng.random() < 0.5 else str.rjust
+        for line, number in zip(lines, numbers, strict=False):
+            line.append(align(number, width))
+        lines[-1].append(rng.choice("+*").ljust(width))
+    return "\n".join(" ".join(line) for line in lines).encode() + b"\n"
+
+
+def benchmark_parsing(n_problems: int = 100_000, number: int = 1) -> dict[str, float]:
+    """Time `parse_worksheet` against the split and `transposed_parsing` path.
+
+    Returns:
+        dict[str, float]: Average seconds per full parse, per method.
+    """
+    raw = random_worksheet(n_problems)
+
+    def split_and_transpose() -> tuple[list[list[int]], list[list[int]]]:
+        data = raw.decode().splitlines()
+        matrix = [list(map(int, row.split())) for row in data[:-1]]
+        return matrix, transposed_parsing(data[:-1])
+
+    if split_and_transpose() != parse_worksheet(raw)[:2]:
+        raise RuntimeError("Fused parser disagrees with transposed_parsing")
+    return {
+        "split": time_callable(split_and_transpose, number=number),
+        "fused": time_callable(parse_worksheet, raw, number=number),
+    }
+
+
+def benchmark_column_reduce(
+    n_problems: int = 100_000, n_rows: int = 4, number: int = 1
+) -> dict[str, float]:
+    """Time the part 1 `column_reduce` on a list matrix with the Python backend
+    and on the int64 matrix from `parse_worksheet(..., as_array=True)`.
+
+    Returns:
+        dict[str, float]: Average seconds per reduction, per backend.
+    """
+    raw = random_worksheet(n_problems, n_rows)
+    matrix, _, operators = parse_worksheet(raw)
+    array, _, _ = parse_worksheet(raw, as_array=True)
+    reduce_fns: list[ReduceFn] = [math.prod if op == "*" else sum for op in operators]
+    return {
+        "python": time_callable(
+            MatrixReduce.column_reduce, matrix, reduce_fns, "python", number=number
+        ),
+        "array": time_callable(
+            MatrixReduce.column_reduce, array, reduce_fns, "array", number=number
+        ),
+    }
+
+
+def benchmark_ragged_reduce(
+    n_problems: int = 100_000, max_digits: int = 4, number: int = 1
+) -> dict[str, float]:
+    """Time the part 2 `row_reduce` on the list-of-lists ragged matrix and on
+    the RaggedMatrix from `parse_worksheet(..., as_array=True)`. Problems are
+    up to `max_digits` columns wide.
+
+    Returns:
+        dict[str, float]: Average seconds per reduction, per representation.
+    """
+    raw = random_worksheet(n_problems, max_digits=max_digits)
+    _, rows, operators = parse_worksheet(raw)
+    _, ragged, _ = parse_worksheet(raw, as_array=True)
+    reduce_fns: list[ReduceFn] = [math.prod if op == "*" else sum for op in operators]
+    return {
+        "lists": time_callable(
+            MatrixReduce.row_reduce, rows, reduce_fns, True, number=number
+        ),
+        "csr": time_callable(
+            MatrixReduce.row_reduce, ragged, reduce_fns, True, number=number
+        ),
+    }
+
+
+def benchmark_product_tree(
+    n_values: int = 5_000, n_columns: int = 4, digits: int = 20, number: int = 1
+) -> dict[str, float]:
+    """Time `math.prod` against `column_reduce` (which picks `balanced_prod`)
+    on `n_columns` product columns of `n_values` random `digits`-digit ints.
+
+    Returns:
+        dict[str, float]: Average seconds for all columns, per method.
+    """
+    rng = random.Random(0)
+    matrix = [
+        [rng.randrange(10 ** (digits - 1), 10**digits) for _ in range(n_columns)]
+        for _ in range(n_values)
+    ]
+    reduce_fns: list[ReduceFn] = [math.prod] * n_columns
+    columns = [list(col) for col in zip(*matrix, strict=True)]
+    return {
+        "math.prod": time_callable(
+            lambda: [math.prod(col) for col in columns], number=number
+        ),
+        "column_reduce": time_callable(
+            MatrixReduce.column_reduce, matrix, reduce_fns, "python", number=number
+        ),
+    }
+
+
+def benchmark_parallel_reduce(
+    n_problems: int = 1_000_000, max_workers: int | None = None, number: int = 1
+) -> dict[int, float]:
+    """Time `reduce_rows_parallel` with 1..N workers, including pool start-up
+    and block transfer.
+
+    Returns:
+        dict[int, float]: Average seconds per reduction, keyed by worker count.
+    """
+    rows = split_rows(random_worksheet(n_problems))
+    expected = reduce_rows(rows)
+    timings: dict[int, float] = {}
+    for workers in range(1, (max_workers or os.cpu_count() or 1) + 1):
+        if reduce_rows_parallel(rows, workers, min_block=1) != expected:
+            raise RuntimeError("Parallel reduction disagrees with the serial one")
+        timings[workers] = time_callable(
+            reduce_rows_parallel, rows, workers, 1, number=number
+        )
+    return timings
+
+
+def benchmark_streaming(
+    n_problems: int = 1_000_000, window: int = 1 << 16
+) -> dict[str, dict[str, float]]:
+    """Compare reading the whole sheet and `reduce_rows` with
+    `reduce_file_streaming` on a temporary sheet file.
+
+    Returns:
+        dict[str, dict[str, float]]: "seconds" and "peak_bytes" per method, from
+        a single run each.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sheet.txt"
+        path.write_bytes(random_worksheet(n_problems))
+
+        def in_memory() -> tuple[int, int]:
+            return reduce_rows(split_rows(path.read_bytes()))
+
+        results: dict[str, dict[str, float]] = {}
+        answers = []
+        for name, fn, args in (
+            ("in_memory", in_memory, ()),
+            ("streaming", reduce_file_streaming, (path, window)),
+        ):
+            answer, peak = peak_memory_callable(fn, *args)
+            answers.append(answer)
+            results[name] = {
+                "seconds": time_callable(fn, *args, number=1),
+                "peak_bytes": peak,
+            }
+        if answers[0] != answers[1]:
+            raise RuntimeError("Streaming reduction disagrees with reduce_rows")
+    return results
+
+
 def main() -> None:
     data_path: Path = (
         Path(__file__).parent.parent.parent / "data" / "2025" / "day06.txt"
@@ -93,18 +915,17 @@ def main() -> None:
     if not data_path.exists():
         raise FileNotFoundError(f"Data file not found at {data_path}")
 
-    data: list[str] = data_path.read_text().splitlines()
+    raw: bytes = data_path.read_bytes()
 
-    if not data:
+    if not raw.strip():
         raise ValueError("Input data is empty")
 
-    pprint(data)
-
-    # The last line is the operators, the remaining form the matrix.
+    # The last line is the operators, the remaining form the matrix. Both
+    # readings of the numbers come out of one scan.
 
-    operators: list[str] = data[-1].split()
+    matrix, matrix_transposed, operators = parse_worksheet(raw, as_array=True)
 
-    matrix: list[list[int]] = [list(map(int, row.split())) for row in data[:-1]]
+    pprint(matrix)
 
     # Convert operators from str to callable. There will be only two: "*" or "+".
 
@@ -114,8 +935,6 @@ def main() -> None:
 
     print(f"Solution to part 1: {sum(col_reduced)}")
 
-    matrix_transposed: list[list[int]] = transposed_parsing(data[:-1])
-
     row_reduced: list[int] = MatrixReduce.row_reduce(
         matrix_transposed, reduce_fns, ragged=True
     )
@@ -1,4 +1,5 @@
 import timeit
+import tracemalloc
 from collections.abc import Callable
 from typing import Any
 
@@ -10,4 +11,16 @@ def time_callable(fn: Callable[..., Any], *args: Any, number: int = 5) -> float:
     return total_time / number
 
 
-__all__ = ["time_callable"]
+def peak_memory_callable(fn: Callable[..., Any], *args: Any) -> tuple[Any, int]:
+    """Run a callable once under tracemalloc, returning its result and the peak
+    number of bytes allocated while it ran."""
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+__all__ = ["time_callable", "peak_memory_callable"]
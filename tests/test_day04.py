@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import pytest
 from hypothesis import given
 import hypothesis.strategies as st
@@ -319,3 +321,529 @@ def test_convolve_shape(data):
 
     assert len(out) == expected_h
     assert all(len(row) == expected_w for row in out)
+
+
+# ---------------------------------------------------------------------------
+# Memory-mapped banded convolution
+# ---------------------------------------------------------------------------
+
+
+EXAMPLE_GRID = [
+    "..@@.@@@@.",
+    "@@@.@.@.@@",
+    "@@@@@.@.@@",
+    "@.@@@@..@.",
+    "@@.@@@@.@@",
+    ".@@@@@@@.@",
+    ".@.@.@.@@@",
+    "@.@@@.@@@@",
+    ".@@@@@@@@.",
+    "@.@.@@@.@.",
+]
+
+ADJACENCY_KERNEL = [[1, 1, 1], [1, 0, 1], [1, 1, 1]]
+
+
+def to_int_grid(lines: list[str]) -> list[list[int]]:
+    return [[1 if c == "@" else 0 for c in row] for row in lines]
+
+
+@pytest.mark.parametrize("band_rows", [1, 3, 4, 100])
+def test_count_available_banded_example(tmp_path, band_rows) -> None:
+    path = tmp_path / "grid.txt"
+    path.write_text("\n".join(EXAMPLE_GRID) + "\n")
+    assert d04.count_available_banded(path, band_rows=band_rows) == 13
+
+
+def test_grid_file_crlf_and_unequal_rows(tmp_path) -> None:
+    path = tmp_path / "grid.txt"
+    path.write_bytes(b"@.\r\n.@\r\n")
+    with d04.GridFile(path) as grid:
+        assert (grid.height, grid.width) == (2, 2)
+        assert grid.read_rows(-1, 3) == [[0, 0], [1, 0], [0, 1], [0, 0]]
+
+    path.write_text("@.\n.@@\n")
+    with pytest.raises(ValueError):
+        d04.GridFile(path)
+
+
+@given(
+    data=conv_input_strategy(),
+    band_rows=st.integers(min_value=1, max_value=4),
+)
+def test_convolve_to_file_matches_convolve(tmp_path_factory, data, band_rows):
+    data, kernel, padding = data
+    grid_data = [[abs(v) % 2 for v in row] for row in data]
+    path = tmp_path_factory.mktemp("bands") / "grid.txt"
+    path.write_text(
+        "\n".join("".join("@" if v else "." for v in row) for row in grid_data)
+    )
+
+    conv = d04.Conv2d(kernel)
+    with d04.GridFile(path) as grid:
+        shape = conv.convolve_to_file(
+            grid, path.with_suffix(".out"), padding, band_rows
+        )
+
+    expected = conv.convolve(grid_data, padding=padding)
+    written = [
+        list(map(int, line.split()))
+        for line in path.with_suffix(".out").read_text().splitlines()
+    ]
+    assert shape == (len(expected), len(expected[0]))
+    assert written == expected
+
+
+# ---------------------------------------------------------------------------
+# Shared-memory parallel convolution
+# ---------------------------------------------------------------------------
+
+
+def test_removal_counts_example() -> None:
+    conv = d04.Conv2d(ADJACENCY_KERNEL)
+    assert d04.removal_counts(to_int_grid(EXAMPLE_GRID), conv.convolve) == (13, 43)
+
+
+@pytest.mark.parametrize(
+    ("shape", "tile_size", "expected"),
+    [
+        ((2, 3), (1, 3), [(0, 1, 0, 3), (1, 2, 0, 3)]),
+        ((3, 3), (2, 2), [(0, 2, 0, 2), (0, 2, 2, 3), (2, 3, 0, 2), (2, 3, 2, 3)]),
+    ],
+)
+def test_split_tiles(shape, tile_size, expected) -> None:
+    assert d04.SharedConv2dPool.split_tiles(shape, tile_size) == expected
+
+
+@pytest.mark.parametrize("padding", [0, 1, 2])
+def test_convolve_parallel_matches_convolve(padding) -> None:
+    kernel = [[1, -2, 0], [3, 0, 1]]
+    data = [[(3 * r + 5 * c) % 7 - 3 for c in range(9)] for r in range(7)]
+    conv = d04.Conv2d(kernel)
+    assert conv.convolve_parallel(data, padding, workers=2) == conv.convolve(
+        data, padding
+    )
+
+
+def test_shared_pool_reused_across_rounds() -> None:
+    grid = to_int_grid(EXAMPLE_GRID)
+    with d04.SharedConv2dPool(
+        ADJACENCY_KERNEL, (10, 10), workers=2, tile_size=(3, 4)
+    ) as pool:
+        assert d04.removal_counts(grid, pool.convolve) == (13, 43)
+        with pytest.raises(ValueError):
+            pool.convolve([[1, 0]])
+    pool.close()  # already closed by the with block
+    with pytest.raises(ValueError):
+        pool.convolve(grid)
+
+
+def test_shared_pool_failed_init_releases_segments(monkeypatch) -> None:
+    def segments() -> set[str]:
+        shm = Path("/dev/shm")
+        return {p.name for p in shm.glob("psm_*")} if shm.is_dir() else set()
+
+    before = segments()
+    with pytest.raises(ValueError):
+        d04.SharedConv2dPool(ADJACENCY_KERNEL, (5, 5), workers=1, tile_size=(0, 3))
+
+    def broken_executor(*args, **kwargs):
+        raise RuntimeError("no workers")
+
+    monkeypatch.setattr(d04, "ProcessPoolExecutor", broken_executor)
+    with pytest.raises(RuntimeError):
+        d04.SharedConv2dPool(ADJACENCY_KERNEL, (5, 5), workers=1)
+    assert segments() == before
+
+
+# ---------------------------------------------------------------------------
+# Sparse coordinate-set backend
+# ---------------------------------------------------------------------------
+
+
+def test_sparse_grid_round_trip() -> None:
+    grid = to_int_grid(EXAMPLE_GRID)
+    sparse = d04.SparseGrid.from_dense(grid)
+    assert len(sparse) == sum(map(sum, grid))
+    assert sparse.to_dense() == grid
+    assert sparse.unpack(sparse.pack(3, 7)) == (3, 7)
+
+
+def test_sparse_grid_rejects_bad_input() -> None:
+    with pytest.raises(ValueError):
+        d04.SparseGrid([(0, 2)], (2, 2))
+    with pytest.raises(ValueError):
+        d04.SparseGrid([], (2, 2), kernel=[[1, 1]])
+    with pytest.raises(ValueError):
+        d04.SparseGrid([], (2, 2), kernel=[[0, 0, 0], [0, 0, -1], [0, 0, 0]])
+
+
+@pytest.mark.parametrize("backend", ["auto", "sparse", "dense"])
+def test_solve_example(backend) -> None:
+    assert d04.solve(to_int_grid(EXAMPLE_GRID), backend=backend) == (13, 43)
+
+
+def test_select_backend() -> None:
+    grid = to_int_grid(EXAMPLE_GRID)
+    assert d04.select_backend(grid, ADJACENCY_KERNEL) == "sparse"
+    assert d04.select_backend(grid, [[0, 0, 0], [0, 0, -1], [0, 0, 0]]) == "dense"
+
+
+@st.composite
+def binary_grid_strategy(draw, max_size=8):
+    rows = draw(st.integers(min_value=1, max_value=max_size))
+    cols = draw(st.integers(min_value=1, max_value=max_size))
+    return draw(
+        st.lists(
+            st.lists(st.integers(0, 1), min_size=cols, max_size=cols),
+            min_size=rows,
+            max_size=rows,
+        )
+    )
+
+
+@given(
+    grid=binary_grid_strategy(),
+    kernel=st.sampled_from(
+        [
+            ADJACENCY_KERNEL,
+            [[0, 1, 0], [1, 0, 1], [0, 1, 0]],
+            [[2, 0, 1]] * 3,
+            [[1, 0, 1]],
+            [[1, 1, 1, 1, 1], [1, 1, 0, 1, 1], [1, 1, 1, 1, 1]],
+        ]
+    ),
+    threshold=st.integers(min_value=0, max_value=9),
+)
+def test_sparse_matches_dense(grid, kernel, threshold) -> None:
+    dense = d04.solve(grid, kernel, threshold, backend="dense")
+    sparse = d04.solve(grid, kernel, threshold, backend="sparse")
+    assert sparse == dense
+
+
+def test_non_square_kernel_on_dense_grid() -> None:
+    # A fully occupied grid is above SPARSE_MAX_DENSITY, so "auto" picks dense.
+    grid = [[1] * 5 for _ in range(5)]
+    kernel = [[1, 1, 1]]
+    assert d04.select_backend(grid, kernel) == "dense"
+    expected = d04.solve(grid, kernel, 1, backend="sparse")
+    assert d04.solve(grid, kernel, 1) == expected
+    assert d04.solve(grid, [[1], [0], [1]], 2) == d04.solve(
+        grid, [[1], [0], [1]], 2, backend="sparse"
+    )
+
+
+# ---------------------------------------------------------------------------
+# In-place buffers and the removal pipeline
+# ---------------------------------------------------------------------------
+
+
+def test_mask_helpers_in_place() -> None:
+    mask = [1, 0, 0, 1]
+    assert d04.invert_mask_into(mask) is mask
+    assert mask == [0, 1, 1, 0]
+
+    data = [1, 1, 0, 1]
+    d04.apply_removal_mask_into(data, mask)
+    assert data == [1, 0, 0, 1]
+
+    out = [9, 9, 9, 9]
+    assert d04.compute_availability_into(out, [3, 4, 0, 5], [1, 1, 0, 1], 5) == 2
+    assert out == [1, 1, 0, 0]
+
+
+def test_convolve_into_rejects_bad_buffers() -> None:
+    conv = d04.Conv2d(ADJACENCY_KERNEL)
+    with pytest.raises(ValueError):
+        conv.convolve_into([0] * 6, [0] * 6, 4)
+    with pytest.raises(ValueError):
+        conv.convolve_into([0] * 4, [0] * 6, 3)
+
+
+@given(data=conv_input_strategy())
+def test_convolve_into_matches_convolve(data) -> None:
+    data, kernel, padding = data
+    conv = d04.Conv2d(kernel)
+    padded = d04.Conv2d.pad_matrix(data, padding)
+    width = len(padded[0])
+    flat = [val for row in padded for val in row]
+    out = [None] * len(flat)
+    conv.convolve_into(out, flat, width)
+
+    expected = conv.convolve(data, padding)
+    center_h = len(kernel) // 2
+    center_w = len(kernel[0]) // 2
+    for i, row in enumerate(expected):
+        for j, val in enumerate(row):
+            assert out[(i + center_h) * width + j + center_w] == val
+    assert out.count(None) == len(flat) - len(expected) * len(expected[0])
+
+
+def test_removal_pipeline_example() -> None:
+    pipeline = d04.RemovalPipeline(to_int_grid(EXAMPLE_GRID))
+    assert pipeline.run() == (13, 43)
+    assert (
+        sum(map(sum, pipeline.to_dense()))
+        == sum(map(sum, to_int_grid(EXAMPLE_GRID))) - 43
+    )
+
+
+@given(grid=binary_grid_strategy(), threshold=st.integers(min_value=0, max_value=9))
+def test_removal_pipeline_matches_list_loop(grid, threshold) -> None:
+    conv = d04.Conv2d(ADJACENCY_KERNEL)
+    expected = d04.removal_counts(grid, conv.convolve, threshold)
+    assert d04.RemovalPipeline(grid, threshold=threshold).run() == expected
+
+
+# ---------------------------------------------------------------------------
+# FFT convolution path
+# ---------------------------------------------------------------------------
+
+
+requires_numpy = pytest.mark.skipif(d04.np is None, reason="NumPy is not installed")
+
+
+@requires_numpy
+@given(data=conv_input_strategy())
+def test_convolve_fft_matches_direct(data) -> None:
+    data, kernel, padding = data
+    conv = d04.Conv2d(kernel)
+    fft = conv.convolve(data, padding, method="fft")
+    assert fft == conv.convolve(data, padding, method="direct")
+    assert all(type(v) is int for row in fft for v in row)
+
+
+@requires_numpy
+def test_convolve_fft_large_kernel() -> None:
+    kernel = [[(3 * i + j) % 5 - 2 for j in range(17)] for i in range(16)]
+    data = [[(7 * r * c + r) % 11 for c in range(20)] for r in range(18)]
+    conv = d04.Conv2d(kernel)
+    assert conv.select_method(data, padding=8) == "fft"
+    assert conv.convolve(data, padding=8) == conv.convolve(
+        data, padding=8, method="direct"
+    )
+
+
+@requires_numpy
+def test_select_method() -> None:
+    big = [[1] * 20 for _ in range(20)]
+    conv = d04.Conv2d(ADJACENCY_KERNEL)
+    assert conv.select_method([[1, 0], [0, 1]]) == "direct"
+    assert conv.select_method(big) == "fft"
+    assert conv.select_method([[1.0] * 20 for _ in range(20)]) == "direct"
+    assert conv.select_method([[2**40] * 20 for _ in range(20)]) == "direct"
+
+
+def test_convolve_unknown_method() -> None:
+    with pytest.raises(ValueError):
+        d04.Conv2d([[1]]).convolve([[1]], method="winograd")
+
+
+# ---------------------------------------------------------------------------
+# Batched convolution
+# ---------------------------------------------------------------------------
+
+
+@st.composite
+def batch_strategy(draw):
+    rows = draw(st.integers(min_value=1, max_value=5))
+    cols = draw(st.integers(min_value=1, max_value=5))
+    grid = st.lists(
+        st.lists(st.integers(-10, 10), min_size=cols, max_size=cols),
+        min_size=rows,
+        max_size=rows,
+    )
+    grids = draw(st.lists(grid, min_size=1, max_size=6))
+    kernel = draw(
+        st.lists(
+            st.lists(st.integers(-2, 2), min_size=3, max_size=3),
+            min_size=2,
+            max_size=2,
+        )
+    )
+    padding = draw(st.integers(0, 2))
+    return grids, kernel, padding
+
+
+@given(data=batch_strategy())
+def test_convolve_batch_matches_convolve(data) -> None:
+    grids, kernel, padding = data
+    conv = d04.Conv2d(kernel)
+    expected = [conv.convolve(grid, padding, method="direct") for grid in grids]
+    assert conv.convolve_batch(grids, padding) == expected
+
+
+def test_convolve_batch_rejects_mixed_shapes() -> None:
+    conv = d04.Conv2d(ADJACENCY_KERNEL)
+    assert conv.convolve_batch([]) == []
+    with pytest.raises(ValueError):
+        conv.convolve_batch([[[1, 0]], [[1], [0]]])
+
+
+@given(
+    grids=st.lists(binary_grid_strategy(max_size=4), min_size=1, max_size=8),
+    threshold=st.integers(min_value=0, max_value=9),
+)
+def test_batch_available_counts_ragged(grids, threshold) -> None:
+    expected = [d04.solve(grid, threshold=threshold)[0] for grid in grids]
+    assert d04.batch_available_counts(grids, threshold) == expected
+
+
+def test_batch_available_counts_example() -> None:
+    grid = to_int_grid(EXAMPLE_GRID)
+    assert d04.batch_available_counts([grid, [[1]], grid]) == [13, 1, 13]
+
+
+@requires_numpy
+def test_batch_functions_accept_ndarray_stack() -> None:
+    stack = d04.np.random.default_rng(0).integers(0, 2, (3, 5, 5))
+    grids = stack.tolist()
+    conv = d04.Conv2d(ADJACENCY_KERNEL)
+    assert conv.convolve_batch(stack) == conv.convolve_batch(grids)
+    assert d04.batch_available_counts(stack) == d04.batch_available_counts(grids)
+    assert d04.batch_available_counts(stack[:0]) == []
+    with pytest.raises(ValueError):
+        conv.convolve_batch(stack[0])
+    with pytest.raises(ValueError):
+        d04.batch_available_counts(stack[0])
+
+
+# ---------------------------------------------------------------------------
+# HashLife quadtree engine
+# ---------------------------------------------------------------------------
+
+
+def test_hashlife_example() -> None:
+    grid = to_int_grid(EXAMPLE_GRID)
+    final, removed = d04.HashLifeEngine().run(grid)
+    pipeline = d04.RemovalPipeline(grid)
+    pipeline.run()
+    assert removed == 43
+    assert final == pipeline.to_dense()
+
+
+def test_hashlife_nodes_are_hash_consed() -> None:
+    engine = d04.HashLifeEngine()
+    grid = [[1, 0, 1, 0], [0, 1, 0, 1]] * 2
+    assert engine.from_grid(grid) is engine.from_grid(grid)
+    root = engine.from_grid(grid)
+    assert root.nw is root.ne
+    assert engine.to_grid(engine.expand(root), (4, 4)) == grid
+
+
+def test_hashlife_rejects_large_kernel() -> None:
+    with pytest.raises(ValueError):
+        d04.HashLifeEngine(kernel=[[1] * 5] * 5)
+
+
+@given(
+    grid=binary_grid_strategy(max_size=12),
+    kernel=st.sampled_from(
+        [ADJACENCY_KERNEL, [[0, 1, 0], [1, 0, 1], [0, 1, 0]], [[2, 0, 1]] * 3]
+    ),
+    threshold=st.integers(min_value=0, max_value=9),
+)
+def test_hashlife_matches_removal_loop(grid, kernel, threshold) -> None:
+    pipeline = d04.RemovalPipeline(grid, kernel, threshold)
+    _, removed = pipeline.run()
+    assert d04.HashLifeEngine(kernel, threshold).run(grid) == (
+        pipeline.to_dense(),
+        removed,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Core decomposition
+# ---------------------------------------------------------------------------
+
+
+def test_core_decomposition_example() -> None:
+    cores = d04.core_decomposition(to_int_grid(EXAMPLE_GRID))
+    assert cores.answers([4])[4] == (13, 43)
+    assert cores.part1(4) == 13
+    assert cores.part2(4) == 43
+    assert cores.core[0][0] == -1
+    assert cores.degree[0][0] == -1
+
+
+def test_core_decomposition_non_positive_thresholds() -> None:
+    cores = d04.core_decomposition([[1]])
+    assert cores.answers([-1]) == {-1: (0, 0)}
+    assert cores.answers([-3, 0]) == {-3: (0, 0), 0: (0, 0)}
+    assert (cores.part1(-1), cores.part2(-1)) == (0, 0)
+
+
+def test_core_decomposition_full_block() -> None:
+    cores = d04.core_decomposition([[1] * 3 for _ in range(3)])
+    # Corners have 3 neighbors, but the block as a whole is a 3-core.
+    assert cores.degree == [[3, 5, 3], [5, 8, 5], [3, 5, 3]]
+    assert cores.core == [[3] * 3 for _ in range(3)]
+
+
+@given(
+    grid=binary_grid_strategy(max_size=10),
+    kernel=st.sampled_from(
+        [ADJACENCY_KERNEL, [[0, 1, 0], [1, 0, 1], [0, 1, 0]], [[2, 0, 1]] * 3]
+    ),
+)
+def test_core_decomposition_matches_peeling(grid, kernel) -> None:
+    cores = d04.core_decomposition(grid, kernel)
+    answers = cores.answers(range(0, 10))
+    for threshold in range(0, 10):
+        expected = d04.solve(grid, kernel, threshold, backend="sparse")
+        assert answers[threshold] == expected
+        assert (cores.part1(threshold), cores.part2(threshold)) == expected
+
+
+# ---------------------------------------------------------------------------
+# Incremental grid edits
+# ---------------------------------------------------------------------------
+
+
+def test_incremental_grid_example() -> None:
+    grid = to_int_grid(EXAMPLE_GRID)
+    inc = d04.IncrementalGrid(grid)
+    assert inc.answers() == (13, 43)
+
+    grid[0][0] = 1
+    assert inc.set_cell(0, 0) == d04.solve(grid)
+    grid[4][4] = 0
+    assert inc.clear_cell(4, 4) == d04.solve(grid)
+    assert inc.clear_cell(4, 4) == d04.solve(grid)  # Already empty.
+    assert inc.to_dense() == grid
+
+    with pytest.raises(ValueError):
+        inc.set_cell(10, 0)
+
+
+@st.composite
+def edit_sequence_strategy(draw):
+    grid = draw(binary_grid_strategy(max_size=7))
+    rows, cols = len(grid), len(grid[0])
+    edits = draw(
+        st.lists(
+            st.tuples(
+                st.booleans(),
+                st.integers(0, rows - 1),
+                st.integers(0, cols - 1),
+            ),
+            max_size=15,
+        )
+    )
+    return grid, edits
+
+
+@given(
+    data=edit_sequence_strategy(),
+    kernel=st.sampled_from(
+        [ADJACENCY_KERNEL, [[0, 1, 0], [1, 0, 1], [0, 1, 0]], [[2, 0, 1]] * 3]
+    ),
+    threshold=st.integers(min_value=0, max_value=9),
+)
+def test_incremental_grid_matches_full_recompute(data, kernel, threshold) -> None:
+    grid, edits = data
+    inc = d04.IncrementalGrid(grid, kernel, threshold)
+    for place, r, c in edits:
+        grid[r][c] = 1 if place else 0
+        answers = inc.set_cell(r, c) if place else inc.clear_cell(r, c)
+        assert answers == d04.solve(grid, kernel, threshold, backend="dense")
@@ -1,7 +1,7 @@
 # tests/test_day05.py
 
 import pytest
-from hypothesis import given
+from hypothesis import given, settings
 import hypothesis.strategies as st
 
 import aoc2025.day05 as d05
@@ -183,3 +183,488 @@ def test_optimize_ranges_preserves_membership(ranges, point):
     ref_orig = in_any(point, ranges)
     ref_merged = in_any(point, merged)
     assert ref_orig == ref_merged
+
+
+# ---------------------------------------------------------------------------
+# Bisect-based membership
+# ---------------------------------------------------------------------------
+
+
+def test_merged_bounds_built_from_unmerged_input():
+    mr = d05.MultiRange([[10, 20], [0, 5], [4, 12], [30, 30], [40, 35]])
+    assert mr.starts == [0]
+    assert mr.ends == [20]
+    assert 19 in mr
+    assert 30 not in mr
+    assert 37 not in mr
+
+
+# ---------------------------------------------------------------------------
+# Bulk membership
+# ---------------------------------------------------------------------------
+
+
+def test_bulk_membership_example():
+    mr = d05.MultiRange([[3, 6], [10, 15], [16, 21], [12, 19]])
+    ids = [1, 5, 8, 11, 17, 32]
+    assert mr.mask_contained(ids) == [False, True, False, True, True, False]
+    assert mr.count_contained(ids) == 3
+    assert mr.count_contained(sorted(ids), presorted=True) == 3
+    assert d05.MultiRange([]).count_contained(ids) == 0
+
+
+@given(ranges=intervals_strategy(), ids=st.lists(st.integers(-20_000, 20_000)))
+def test_bulk_membership_matches_contains(ranges, ids):
+    mr = d05.MultiRange(ranges)
+    expected = [value in mr for value in ids]
+    assert mr.mask_contained(ids) == expected
+    assert mr.count_contained(ids) == sum(expected)
+    assert mr.count_contained(sorted(ids), presorted=True) == sum(expected)
+
+
+@pytest.mark.skipif(d05.np is None, reason="NumPy is not installed")
+@given(ranges=intervals_strategy(), ids=st.lists(st.integers(-20_000, 20_000)))
+def test_bulk_membership_array_path(ranges, ids):
+    mr = d05.MultiRange(ranges)
+    array = d05.np.array(ids, dtype=d05.np.int64)
+    assert mr.mask_contained(array).tolist() == [value in mr for value in ids]
+    assert mr.count_contained(array) == sum(value in mr for value in ids)
+
+
+@pytest.mark.skipif(d05.np is None, reason="NumPy is not installed")
+def test_bulk_membership_array_path_past_int64():
+    mr = d05.MultiRange([[0, 10], [2**63, 2**63 + 5]])
+    array = d05.np.array([-1, 5, 20], dtype=d05.np.int64)
+    for _ in range(2):
+        assert list(mr.mask_contained(array)) == [False, True, False]
+    # The failed conversion is remembered rather than retried per call.
+    assert mr._bound_arrays is False
+
+
+# ---------------------------------------------------------------------------
+# Mutable interval sets
+# ---------------------------------------------------------------------------
+
+
+def test_interval_set_edits():
+    iset = d05.IntervalSet([[5, 10]])
+    iset.add(10, 12)  # adjacent: merges
+    assert iset.intervals() == [[5, 12]]
+    iset.add(20, 25)
+    iset.remove(7, 22)
+    assert iset.intervals() == [[5, 7], [22, 25]]
+    assert len(iset) == 5
+    iset.remove(0, 100)
+    assert iset.intervals() == []
+    assert len(iset) == 0
+
+
+def test_interval_set_operators():
+    a = d05.IntervalSet([[0, 10], [20, 30]])
+    b = d05.IntervalSet([[5, 25]])
+    assert (a | b).intervals() == [[0, 30]]
+    assert (a & b).intervals() == [[5, 10], [20, 25]]
+    assert (a - b).intervals() == [[0, 5], [25, 30]]
+    assert list(a.to_multi_range()) == list(a)
+
+
+def interval_ops_strategy():
+    op = st.sampled_from(["add", "remove"])
+    lo = st.integers(min_value=-50, max_value=50)
+    width = st.integers(min_value=-3, max_value=20)
+    return st.lists(
+        st.builds(lambda o, s, w: (o, s, s + w), op, lo, width), max_size=25
+    )
+
+
+def apply_ops(ops):
+    iset = d05.IntervalSet()
+    ref: set[int] = set()
+    for op, lo, hi in ops:
+        if op == "add":
+            iset.add(lo, hi)
+            ref |= set(range(lo, hi))
+        else:
+            iset.remove(lo, hi)
+            ref -= set(range(lo, hi))
+    return iset, ref
+
+
+def assert_canonical(iset):
+    pairs = iset.intervals()
+    assert all(start < end for start, end in pairs)
+    assert all(e1 < s2 for (_, e1), (s2, _) in zip(pairs, pairs[1:], strict=False))
+
+
+@given(ops=interval_ops_strategy())
+def test_interval_set_matches_set_reference(ops):
+    iset, ref = apply_ops(ops)
+    assert_canonical(iset)
+    assert list(iset) == sorted(ref)
+    assert len(iset) == len(ref)
+    assert all((v in iset) == (v in ref) for v in range(-60, 80))
+
+
+@given(ops_a=interval_ops_strategy(), ops_b=interval_ops_strategy())
+def test_interval_set_algebra_matches_set_reference(ops_a, ops_b):
+    a, ref_a = apply_ops(ops_a)
+    b, ref_b = apply_ops(ops_b)
+    for result, ref in [
+        (a | b, ref_a | ref_b),
+        (a & b, ref_a & ref_b),
+        (a - b, ref_a - ref_b),
+        (b - a, ref_b - ref_a),
+    ]:
+        assert_canonical(result)
+        assert list(result) == sorted(ref)
+        assert len(result) == len(ref)
+
+
+# ---------------------------------------------------------------------------
+# Compact array-backed storage
+# ---------------------------------------------------------------------------
+
+
+def test_compact_multi_range_uses_int64_buffers():
+    compact = d05.MultiRange([[10, 14], [0, 3], [2, 5]]).compact()
+    assert isinstance(compact.starts, d05.array)
+    assert compact.intervals() == [[0, 5], [10, 14]]
+    assert list(compact) == [0, 1, 2, 3, 4, 10, 11, 12, 13]
+    assert len(compact) == 9
+    assert compact.nbytes == 4 * 8
+    assert not hasattr(compact, "__dict__")
+
+
+def test_compact_multi_range_big_int_fallback():
+    big = 2**70
+    compact = d05.CompactMultiRange([[0, 2], [big, big + 3]])
+    assert isinstance(compact.starts, list)
+    assert compact.intervals() == [[0, 2], [big, big + 3]]
+    assert big + 2 in compact
+    assert big + 3 not in compact
+    assert len(compact) == 5
+
+
+@given(ranges=intervals_strategy(), point=st.integers(-20_000, 20_000))
+def test_compact_multi_range_matches_merged_reference(ranges, point):
+    compact = d05.CompactMultiRange(ranges)
+    ref = set(x for start, stop in ranges for x in range(start, stop))
+    assert (point in compact) == (point in ref)
+    assert len(compact) == len(ref)
+    assert list(compact) == sorted(ref)
+
+
+# ---------------------------------------------------------------------------
+# External-memory merge
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [("3-5", [3, 6]), ("10-10", [10, 11]), ("-4--2", [-4, -1])],
+)
+def test_parse_range_line(line, expected):
+    assert d05.parse_range_line(line) == expected
+
+
+def test_interval_file_round_trip(tmp_path):
+    path = tmp_path / "intervals.bin"
+    intervals = [(-(2**63), -5), (0, 3), (2**62, 2**63 - 1)]
+    assert d05.write_interval_file(path, intervals) == 3
+    assert list(d05.iter_interval_file(path, chunk_records=2)) == intervals
+
+
+def test_external_optimize_ranges_example(tmp_path):
+    lines = ["3-5", "10-14", "", "16-20", "12-18"]
+    out = tmp_path / "merged.bin"
+    assert d05.external_optimize_ranges(lines, out, chunk_size=2) == 2
+    mr = d05.MultiRange.load(out)
+    assert mr.starts == [3, 10]
+    assert mr.ends == [6, 21]
+    assert len(mr) == 14
+
+
+@given(
+    ranges=st.lists(
+        st.tuples(st.integers(-1_000, 1_000), st.integers(0, 200)), max_size=60
+    ),
+    chunk_size=st.integers(min_value=1, max_value=10),
+)
+def test_external_optimize_ranges_matches_in_memory(
+    tmp_path_factory, ranges, chunk_size
+):
+    lines = [f"{lo}-{lo + width}" for lo, width in ranges]
+    out = tmp_path_factory.mktemp("external") / "merged.bin"
+    d05.external_optimize_ranges(lines, out, chunk_size=chunk_size)
+
+    expected = d05.MultiRange.optimize_ranges(
+        [d05.parse_range_line(line) for line in lines]
+    )
+    assert [list(r) for r in d05.iter_interval_file(out)] == expected
+
+
+def test_external_optimize_ranges_bounds_open_runs(tmp_path, monkeypatch):
+    fan_ins = []
+    real_merge = d05.heapq.merge
+
+    def spy_merge(*iterables):
+        fan_ins.append(len(iterables))
+        return real_merge(*iterables)
+
+    monkeypatch.setattr(d05.heapq, "merge", spy_merge)
+    lines = [f"{3 * i}-{3 * i + (i % 4)}" for i in range(40)]
+    out = tmp_path / "merged.bin"
+    d05.external_optimize_ranges(lines, out, chunk_size=1, max_open_runs=3)
+
+    assert len(fan_ins) > 1
+    assert max(fan_ins) <= 3
+    expected = d05.MultiRange.optimize_ranges(
+        [d05.parse_range_line(line) for line in lines]
+    )
+    assert [list(r) for r in d05.iter_interval_file(out)] == expected
+
+    with pytest.raises(ValueError):
+        d05.external_optimize_ranges(lines, out, max_open_runs=1)
+
+
+# ---------------------------------------------------------------------------
+# Parallel merge
+# ---------------------------------------------------------------------------
+
+
+def test_optimize_ranges_parallel_small_input_is_serial():
+    ranges = [[10, 20], [0, 5], [4, 12]]
+    assert d05.MultiRange.optimize_ranges_parallel(ranges, workers=4) == [[0, 20]]
+
+
+@settings(max_examples=20, deadline=None)
+@given(
+    ranges=st.lists(
+        st.lists(st.integers(-100, 100), min_size=2, max_size=2), max_size=80
+    ),
+    workers=st.integers(min_value=2, max_value=3),
+)
+def test_optimize_ranges_parallel_matches_serial(ranges, workers):
+    # Includes empty and reversed intervals, which the serial merge passes through.
+    expected = d05.MultiRange.optimize_ranges(ranges)
+    result = d05.MultiRange.optimize_ranges_parallel(ranges, workers, min_shard=1)
+    assert result == expected
+
+
+# ---------------------------------------------------------------------------
+# Window counts over the prefix-length index
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "lo, hi, expected",
+    [
+        (0, 100, 14),
+        (3, 6, 3),
+        (4, 12, 4),  # 4, 5, 10, 11
+        (6, 10, 0),
+        (12, 12, 0),
+        (20, 10, 0),
+    ],
+)
+def test_count_in(lo, hi, expected):
+    mr = d05.MultiRange([[3, 6], [10, 15], [16, 21], [12, 19]])
+    assert mr.count_in(lo, hi) == expected
+
+
+@given(
+    ranges=intervals_strategy(),
+    windows=st.lists(
+        st.tuples(st.integers(-20_000, 20_000), st.integers(-20_000, 20_000)),
+        max_size=10,
+    ),
+)
+def test_count_in_matches_reference(ranges, windows):
+    mr = d05.MultiRange(ranges)
+    ref = set(x for start, stop in ranges for x in range(start, stop))
+    expected = [sum(1 for x in ref if lo <= x < hi) for lo, hi in windows]
+    los = [lo for lo, _ in windows]
+    his = [hi for _, hi in windows]
+    assert [mr.count_in(lo, hi) for lo, hi in windows] == expected
+    assert mr.count_in_batch(los, his) == expected
+    if d05.np is not None:
+        result = mr.count_in_batch(
+            d05.np.array(los, dtype=d05.np.int64), d05.np.array(his, dtype=d05.np.int64)
+        )
+        assert result.tolist() == expected
+
+
+# ---------------------------------------------------------------------------
+# Memory-mapped range index
+# ---------------------------------------------------------------------------
+
+
+def test_range_index_round_trip(tmp_path):
+    path = tmp_path / "ranges.idx"
+    mr = d05.MultiRange([[3, 6], [10, 15], [16, 21], [12, 19], [-(2**40), -5]])
+    assert mr.save(path, block_size=2) == 3
+    with d05.MultiRange.open(path, verify=True) as mapped:
+        assert list(mapped.intervals()) == list(zip(mr.starts, mr.ends, strict=True))
+        assert len(mapped) == sum(
+            e - s for s, e in zip(mr.starts, mr.ends, strict=True)
+        )
+        assert 20 in mapped and 7 not in mapped and -(2**40) in mapped
+        assert mapped.count_in(4, 12) == 4
+        assert mapped.count_contained([1, 5, 17, 100, -6]) == 3
+
+
+def test_range_index_empty(tmp_path):
+    path = tmp_path / "empty.idx"
+    assert d05.write_range_index(path, []) == 0
+    with d05.MultiRange.open(path, verify=True) as mapped:
+        assert len(mapped) == 0
+        assert 0 not in mapped
+        assert mapped.count_in(-10, 10) == 0
+
+
+def test_range_index_rejects_bad_files(tmp_path):
+    path = tmp_path / "ranges.idx"
+    d05.MultiRange([[0, 1000], [2000, 3000]]).save(path)
+    raw = bytearray(path.read_bytes())
+    raw[d05.INDEX_HEADER.size] ^= 0xFF
+    path.write_bytes(raw)
+    d05.MultiRange.open(path).close()  # not verified by default
+    with pytest.raises(ValueError, match="checksum"):
+        d05.MultiRange.open(path, verify=True)
+
+    # A corrupted header field (here the covered total) must fail too.
+    d05.MultiRange([[0, 1000], [2000, 3000]]).save(path)
+    raw = bytearray(path.read_bytes())
+    fields = list(d05.INDEX_HEADER.unpack_from(raw))
+    fields[6] += 1
+    d05.INDEX_HEADER.pack_into(raw, 0, *fields)
+    path.write_bytes(raw)
+    with pytest.raises(ValueError, match="checksum"):
+        d05.MultiRange.open(path, verify=True)
+
+    path.write_bytes(b"not an index" + bytes(100))
+    with pytest.raises(ValueError):
+        d05.MultiRange.open(path)
+
+    with pytest.raises(ValueError):
+        d05.write_range_index(path, [(0, 5), (3, 8)])
+
+
+@given(
+    ranges=intervals_strategy(),
+    block_size=st.integers(min_value=1, max_value=8),
+    points=st.lists(st.integers(-20_000, 20_000), max_size=20),
+    windows=st.lists(
+        st.tuples(st.integers(-20_000, 20_000), st.integers(-20_000, 20_000)),
+        max_size=5,
+    ),
+)
+def test_range_index_matches_multi_range(
+    tmp_path_factory, ranges, block_size, points, windows
+):
+    mr = d05.MultiRange(ranges)
+    path = tmp_path_factory.mktemp("index") / "ranges.idx"
+    mr.save(path, block_size=block_size)
+    with d05.MultiRange.open(path, verify=True) as mapped:
+        assert [p in mapped for p in points] == [p in mr for p in points]
+        assert [mapped.count_in(lo, hi) for lo, hi in windows] == [
+            mr.count_in(lo, hi) for lo, hi in windows
+        ]
+        assert mapped.count_contained(points) == mr.count_contained(points)
+        assert len(mapped) == mr.count_in(-(2**62), 2**62)
+
+
+# ---------------------------------------------------------------------------
+# Stabbing queries over the raw ranges
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (2, []),
+        (3, [0]),
+        (12, [1, 3]),
+        (16, [2, 3]),
+        (18, [2, 3]),
+        (19, [2]),
+        (21, []),
+    ],
+)
+def test_interval_index_stab(value, expected):
+    index = d05.MultiRange(
+        [[3, 6], [10, 15], [16, 21], [12, 19], [8, 8]]
+    ).interval_index()
+    assert index.stab(value) == expected
+    assert index.depth(value) == len(expected)
+
+
+@given(
+    ranges=intervals_strategy(),
+    ids=st.lists(st.integers(-20_000, 20_000), max_size=30),
+)
+def test_interval_index_matches_brute_force(ranges, ids):
+    index = d05.IntervalIndex(ranges)
+    expected = [
+        [i for i, (start, end) in enumerate(ranges) if start <= x < end] for x in ids
+    ]
+    assert [index.stab(x) for x in ids] == expected
+    assert [index.depth(x) for x in ids] == [len(e) for e in expected]
+    assert index.sweep(ids) == expected
+    ordered = sorted(range(len(ids)), key=ids.__getitem__)
+    assert index.sweep(sorted(ids), presorted=True) == [expected[i] for i in ordered]
+
+
+# ---------------------------------------------------------------------------
+# Compressed product-ID bitmap
+# ---------------------------------------------------------------------------
+
+
+def test_roaring_bitmap_containers():
+    dense = range(1 << 16, (1 << 16) + 10_000)
+    bitmap = d05.RoaringBitmap([*dense, 5, 5, 3, -1])
+    assert bitmap.keys == [-1, 0, 1]
+    assert isinstance(bitmap.containers[2], int)  # past ARRAY_CONTAINER_MAX
+    assert list(bitmap) == [-1, 3, 5, *dense]
+    assert len(bitmap) == 10_003
+    assert 70_000 in bitmap and 4 not in bitmap and -2 not in bitmap
+    assert bitmap.nbytes == 2 * 1 + 2 * 2 + 8192
+
+    mr = d05.MultiRange([[0, 6], [(1 << 16) + 100, (1 << 16) + 200]])
+    assert bitmap.intersection_count(mr) == 2 + 100
+
+
+@given(
+    ids=st.lists(st.integers(-300_000, 300_000), max_size=60),
+    dense_lo=st.integers(-200_000, 200_000),
+    dense_len=st.integers(0, 6_000),
+    ranges=st.lists(
+        st.tuples(st.integers(-300_000, 300_000), st.integers(0, 100_000)),
+        max_size=8,
+    ),
+)
+def test_roaring_bitmap_matches_set(ids, dense_lo, dense_len, ranges):
+    values = ids + list(range(dense_lo, dense_lo + dense_len))
+    ref = set(values)
+    bitmap = d05.RoaringBitmap(values)
+    mr = d05.MultiRange([[lo, lo + width] for lo, width in ranges])
+    assert list(bitmap) == sorted(ref)
+    assert len(bitmap) == len(ref)
+    assert all(v in bitmap for v in ids)
+    assert bitmap.intersection_count(mr) == mr.count_contained(ref)
+
+    streamed = d05.RoaringBitmap(sorted(ids), presorted=True)
+    streamed.update(range(dense_lo, dense_lo + dense_len), presorted=True)
+    assert list(streamed) == sorted(ref)
+    if d05.np is not None:
+        from_array = d05.RoaringBitmap(d05.np.array(values, dtype=d05.np.int64))
+        assert list(from_array) == sorted(ref)
+
+
+def test_roaring_bitmap_add_switches_container():
+    bitmap = d05.RoaringBitmap(range(d05.ARRAY_CONTAINER_MAX))
+    assert not isinstance(bitmap.containers[0], int)
+    bitmap.add(50_000)
+    assert isinstance(bitmap.containers[0], int)
+    assert len(bitmap) == d05.ARRAY_CONTAINER_MAX + 1
+    assert 50_000 in bitmap
@@ -1,7 +1,7 @@
 # tests/test_day06.py
 
 import pytest
-from hypothesis import given
+from hypothesis import given, settings
 from hypothesis import strategies as st
 
 import aoc2025.day06 as d06
@@ -317,3 +317,355 @@ def test_row_reduce_ragged_property(data):
     expected = [op(row) for row, op in zip(matrix, ops, strict=True)]
 
     assert out == expected
+
+
+# ---------------------------------------------------------------------------
+# Fused worksheet parsing
+# ---------------------------------------------------------------------------
+
+EXAMPLE_SHEET = b"123 328  51 64 \n 45 64  387 23 \n  6 98  215 314\n*   +   *   +  \n"
+
+
+def split_and_transpose(raw):
+    data = raw.decode().splitlines()
+    matrix = [list(map(int, row.split())) for row in data[:-1]]
+    return matrix, d06.transposed_parsing(data[:-1]), data[-1].split()
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_parse_worksheet_example(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(d06, "np", None)
+    elif d06.np is None:
+        pytest.skip("NumPy is not installed")
+    matrix, ragged, ops = d06.parse_worksheet(EXAMPLE_SHEET)
+    assert matrix == [[123, 328, 51, 64], [45, 64, 387, 23], [6, 98, 215, 314]]
+    assert ragged == [[1, 24, 356], [369, 248, 8], [32, 581, 175], [623, 431, 4]]
+    assert ops == ["*", "+", "*", "+"]
+
+
+def test_parse_worksheet_trimmed_lines_and_crlf():
+    raw = EXAMPLE_SHEET.replace(b" \n", b"\r\n").rstrip()
+    assert d06.parse_worksheet(raw) == d06.parse_worksheet(EXAMPLE_SHEET)
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"12 3\n+  \n",  # two numbers share an operator
+        b"12 34\n+  -\n",  # unknown operator
+        b"12 x4\n+  *\n",  # stray byte in a number row
+        b"12\n",  # no operator row
+    ],
+)
+def test_parse_worksheet_invalid(raw):
+    with pytest.raises(ValueError):
+        d06.parse_worksheet(raw)
+
+
+def test_column_scanner_windows_match_single_feed():
+    rows = d06.split_rows(EXAMPLE_SHEET)
+    scanner = d06.ColumnScanner(3)
+    problems = []
+    for lo in range(0, 15, 4):  # windows split numbers mid-way
+        problems += scanner.feed(
+            [row[lo : lo + 4] for row in rows[:-1]], rows[-1][lo : lo + 4]
+        )
+    problems += scanner.finish()
+    whole = d06.ColumnScanner(3)
+    assert problems == whole.feed(rows[:-1], rows[-1]) + whole.finish()
+    assert [op for op, _, _ in problems] == ["*", "+", "*", "+"]
+
+
+@given(
+    n_problems=st.integers(min_value=1, max_value=30),
+    n_rows=st.integers(min_value=1, max_value=6),
+    max_digits=st.integers(min_value=1, max_value=6),
+    seed=st.integers(min_value=0, max_value=1000),
+)
+def test_parse_worksheet_matches_transposed_parsing(
+    n_problems, n_rows, max_digits, seed
+):
+    raw = d06.random_worksheet(n_problems, n_rows, max_digits, seed)
+    expected = split_and_transpose(raw)
+    assert d06.parse_worksheet(raw) == expected
+    rows = d06.split_rows(raw)
+    scanner = d06.ColumnScanner(n_rows)
+    problems = scanner.feed(rows[:-1], rows[-1]) + scanner.finish()
+    assert [column for _, _, column in problems] == expected[1]
+
+
+def test_parse_worksheet_big_numbers_fall_back_to_python_ints():
+    raw = d06.random_worksheet(5, n_rows=20, max_digits=25, seed=1)
+    assert d06.parse_worksheet(raw) == split_and_transpose(raw)
+
+
+# ---------------------------------------------------------------------------
+# Array backend for column reductions
+# ---------------------------------------------------------------------------
+
+requires_numpy = pytest.mark.skipif(d06.np is None, reason="NumPy is not installed")
+
+
+@requires_numpy
+def test_column_reduce_array_overflow_falls_back_per_column():
+    big = 2**40
+    matrix = [[big, big, 3, -(2**62)], [big, big, 5, -(2**62)]]
+    ops = [d06.math.prod, sum, d06.math.prod, sum]
+    out = d06.MatrixReduce.column_reduce(matrix, ops, backend="array")
+    assert out == [big * big, 2 * big, 15, -(2**63)]
+    assert all(type(v) is int for v in out)
+
+
+@requires_numpy
+def test_column_reduce_array_declines_unsupported_input():
+    assert d06.MatrixReduce.column_reduce_array([[2**70, 1]], [sum, sum]) is None
+    assert d06.MatrixReduce.column_reduce_array([[1, 2]], [sum, max]) is None
+    # The Python path still answers them.
+    assert d06.MatrixReduce.column_reduce([[1, 2]], [sum, max], backend="array") == [
+        1,
+        2,
+    ]
+
+
+def test_column_reduce_unknown_backend():
+    with pytest.raises(ValueError):
+        d06.MatrixReduce.column_reduce([[1]], [sum], backend="gpu")
+
+
+@requires_numpy
+@given(
+    matrix=st.integers(min_value=1, max_value=6).flatmap(
+        lambda cols: st.lists(
+            st.lists(
+                st.integers(-1_000, 1_000)
+                | st.integers(min_value=-(2**63), max_value=2**63 - 1),
+                min_size=cols,
+                max_size=cols,
+            ),
+            min_size=1,
+            max_size=8,
+        )
+    ),
+    data=st.data(),
+)
+def test_column_reduce_array_matches_python(matrix, data):
+    ops = data.draw(
+        st.lists(reduce_fn_strategy(), min_size=len(matrix[0]), max_size=len(matrix[0]))
+    )
+    assert d06.MatrixReduce.column_reduce(
+        matrix, ops, backend="array"
+    ) == d06.MatrixReduce.column_reduce(matrix, ops, backend="python")
+
+
+@requires_numpy
+@given(
+    n_problems=st.integers(min_value=1, max_value=30),
+    n_rows=st.integers(min_value=1, max_value=8),
+    max_digits=st.integers(min_value=1, max_value=8),
+    seed=st.integers(min_value=0, max_value=1000),
+)
+def test_column_reduce_on_parsed_array(n_problems, n_rows, max_digits, seed):
+    raw = d06.random_worksheet(n_problems, n_rows, max_digits, seed)
+    matrix, _, ops = d06.parse_worksheet(raw)
+    array, _, _ = d06.parse_worksheet(raw, as_array=True)
+    assert isinstance(array, d06.np.ndarray)
+    fns = [d06.math.prod if op == "*" else sum for op in ops]
+    expected = d06.MatrixReduce.column_reduce(matrix, fns, backend="python")
+    assert d06.MatrixReduce.column_reduce(array, fns) == expected
+    assert d06.MatrixReduce.column_reduce(array, fns, backend="python") == expected
+
+
+# ---------------------------------------------------------------------------
+# CSR ragged matrices
+# ---------------------------------------------------------------------------
+
+
+def test_ragged_matrix_layout():
+    ragged = d06.RaggedMatrix.from_rows([[1, 2, 3], [], [4, 5], [6]])
+    assert list(ragged.offsets) == [0, 3, 3, 5, 6]
+    assert len(ragged) == 4
+    assert ragged[2] == [4, 5]
+    assert ragged.tolist() == [[1, 2, 3], [], [4, 5], [6]]
+    ops = [sum, d06.math.prod, d06.math.prod, sum]
+    assert d06.MatrixReduce.row_reduce(ragged, ops, ragged=True) == [6, 1, 20, 6]
+
+
+@pytest.mark.parametrize("offsets", [[], [1, 2], [0, 2, 1, 3], [0, 2]])
+def test_ragged_matrix_invalid_offsets(offsets):
+    with pytest.raises(ValueError):
+        d06.RaggedMatrix([1, 2, 3], offsets)
+
+
+def test_ragged_matrix_reduce_mismatch():
+    with pytest.raises(ValueError):
+        d06.RaggedMatrix.from_rows([[1], [2]]).reduce([sum])
+
+
+def test_ragged_matrix_big_ints_stay_in_lists():
+    ragged = d06.RaggedMatrix.from_rows([[2**70, 1], [3]])
+    assert isinstance(ragged.values, list)
+    assert ragged.reduce([sum, d06.math.prod]) == [2**70 + 1, 3]
+
+
+ragged_values = st.integers(-100, 100) | st.integers(-(2**63), 2**63 - 1)
+
+
+@given(rows=st.lists(st.lists(ragged_values, max_size=8), max_size=12), data=st.data())
+def test_ragged_matrix_reduce_matches_rows(rows, data):
+    ops = data.draw(
+        st.lists(reduce_fn_strategy(), min_size=len(rows), max_size=len(rows))
+    )
+    expected = [op(row) for row, op in zip(rows, ops, strict=True)]
+    ragged = d06.RaggedMatrix.from_rows(rows)
+    assert ragged.reduce(ops) == expected
+    assert ragged.tolist() == rows
+
+
+@given(rows=st.lists(st.lists(ragged_values, min_size=1, max_size=8), max_size=12))
+def test_ragged_matrix_other_reductions_use_python(rows):
+    assert d06.RaggedMatrix.from_rows(rows).reduce([max] * len(rows)) == list(
+        map(max, rows)
+    )
+
+
+@requires_numpy
+@given(
+    n_problems=st.integers(min_value=1, max_value=30),
+    n_rows=st.integers(min_value=1, max_value=8),
+    seed=st.integers(min_value=0, max_value=1000),
+)
+def test_parse_worksheet_ragged_matrix(n_problems, n_rows, seed):
+    raw = d06.random_worksheet(n_problems, n_rows, seed=seed)
+    _, rows, ops = d06.parse_worksheet(raw)
+    _, ragged, _ = d06.parse_worksheet(raw, as_array=True)
+    assert isinstance(ragged, d06.RaggedMatrix)
+    assert ragged.tolist() == rows
+    fns = [d06.math.prod if op == "*" else sum for op in ops]
+    assert d06.MatrixReduce.row_reduce(
+        ragged, fns, ragged=True
+    ) == d06.MatrixReduce.row_reduce(rows, fns, ragged=True)
+
+
+# ---------------------------------------------------------------------------
+# Product trees
+# ---------------------------------------------------------------------------
+
+
+@given(values=st.lists(st.integers(-(10**30), 10**30), max_size=40))
+def test_balanced_prod_matches_math_prod(values):
+    assert d06.balanced_prod(values) == d06.math.prod(values)
+    assert d06.adaptive_prod(iter(values)) == d06.math.prod(values)
+
+
+def test_adaptive_prod_uses_tree_past_thresholds(monkeypatch):
+    calls = []
+    tree = d06.balanced_prod
+    monkeypatch.setattr(
+        d06, "balanced_prod", lambda values: calls.append(len(values)) or tree(values)
+    )
+    wide = [10**19 + i for i in range(d06.PRODUCT_TREE_MIN_COUNT * 10)]
+    assert d06.adaptive_prod(wide[:4]) == d06.math.prod(wide[:4])
+    assert d06.adaptive_prod([3] * 1_000) == 3**1_000  # many operands, few bits
+    assert d06.adaptive_prod([2.0] * 100) == 2.0**100  # not ints
+    assert calls == []
+    assert d06.adaptive_prod(wide) == d06.math.prod(wide)
+    assert calls == [len(wide)]
+
+
+def test_matrix_reduce_long_product_columns():
+    column = [10**19 + 7 * i for i in range(300)]
+    matrix = [[v, v] for v in column]
+    ops = [d06.math.prod, sum]
+    expected = [d06.math.prod(column), sum(column)]
+    assert d06.MatrixReduce.column_reduce(matrix, ops) == expected
+    assert d06.MatrixReduce.row_reduce([column, column], ops) == expected
+    ragged = d06.RaggedMatrix.from_rows([column, column])
+    assert d06.MatrixReduce.row_reduce(ragged, ops, ragged=True) == expected
+
+
+# ---------------------------------------------------------------------------
+# Parallel column blocks
+# ---------------------------------------------------------------------------
+
+
+def test_reduce_rows_example():
+    assert d06.reduce_rows(d06.split_rows(EXAMPLE_SHEET)) == (4277556, 3263827)
+
+
+@pytest.mark.parametrize("n_blocks", [1, 2, 3, 4, 10])
+def test_split_column_blocks_cuts_at_blank_columns(n_blocks):
+    rows = d06.split_rows(EXAMPLE_SHEET)
+    blocks = d06.split_column_blocks(rows, n_blocks)
+    assert blocks[0][0] == 0 and blocks[-1][1] == 15
+    assert all(hi == lo for (_, hi), (lo, _) in zip(blocks, blocks[1:], strict=False))
+    assert all(d06._is_blank_column(rows, lo) for lo, _ in blocks[1:])
+    assert len(blocks) <= min(n_blocks, 4)
+
+
+def test_reduce_rows_parallel_small_input_is_serial():
+    rows = d06.split_rows(EXAMPLE_SHEET)
+    assert d06.reduce_rows_parallel(rows, workers=4) == (4277556, 3263827)
+
+
+@settings(max_examples=10, deadline=None)
+@given(
+    n_problems=st.integers(min_value=1, max_value=40),
+    seed=st.integers(min_value=0, max_value=1000),
+    workers=st.integers(min_value=2, max_value=3),
+)
+def test_reduce_rows_parallel_matches_serial(n_problems, seed, workers):
+    rows = d06.split_rows(d06.random_worksheet(n_problems, seed=seed))
+    expected = d06.reduce_rows(rows)
+    assert d06.reduce_rows_parallel(rows, workers, min_block=1) == expected
+
+
+# ---------------------------------------------------------------------------
+# Streaming reduction
+# ---------------------------------------------------------------------------
+
+
+def test_row_extents_drop_line_endings_and_blank_lines(tmp_path):
+    path = tmp_path / "sheet.txt"
+    path.write_bytes(b"12 3\r\n4  5\n+  *\n  \n\n")
+    assert d06.row_extents(path, chunk_size=3) == [(0, 4), (6, 10), (11, 15)]
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 16, 1 << 20])
+def test_reduce_file_streaming_example(tmp_path, window):
+    path = tmp_path / "sheet.txt"
+    path.write_bytes(EXAMPLE_SHEET)
+    assert d06.reduce_file_streaming(path, window) == (4277556, 3263827)
+
+
+def test_reduce_file_streaming_invalid(tmp_path):
+    path = tmp_path / "sheet.txt"
+    path.write_bytes(b"12 34\n")
+    with pytest.raises(ValueError):
+        d06.reduce_file_streaming(path)
+    with pytest.raises(ValueError):
+        d06.reduce_file_streaming(path, window=0)
+
+
+@settings(deadline=None)
+@given(
+    n_problems=st.integers(min_value=1, max_value=30),
+    n_rows=st.integers(min_value=1, max_value=6),
+    max_digits=st.integers(min_value=1, max_value=8),
+    seed=st.integers(min_value=0, max_value=1000),
+    window=st.integers(min_value=1, max_value=40),
+)
+def test_reduce_file_streaming_matches_matrix_reduce(
+    tmp_path_factory, n_problems, n_rows, max_digits, seed, window
+):
+    raw = d06.random_worksheet(n_problems, n_rows, max_digits, seed)
+    path = tmp_path_factory.mktemp("sheet") / "sheet.txt"
+    path.write_bytes(raw)
+
+    matrix, ragged, ops = d06.parse_worksheet(raw)
+    fns = [d06.math.prod if op == "*" else sum for op in ops]
+    expected = (
+        sum(d06.MatrixReduce.column_reduce(matrix, fns)),
+        sum(d06.MatrixReduce.row_reduce(ragged, fns, ragged=True)),
+    )
+    assert d06.reduce_file_streaming(path, window) == expected